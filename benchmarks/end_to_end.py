@@ -0,0 +1,228 @@
+# Сквозной бенчмарк обработчиков: бот целиком (роутеры, FSM в PostgreSQL, LanguageProcessing, очередь отправки)
+# прогоняет сценарии "проверить слово -> добавить -> Learn -> квиз -> /stats" против локальных заменителей
+# dictionaryapi.dev, google-translate-extended-api.js и Bot API, а данные пишет во временную БД.
+# Подключение к PostgreSQL берётся из тех же переменных окружения, что у бота; нужен Node.js.
+#   python -m benchmarks.end_to_end --users 20 --rounds 2
+import argparse
+import asyncio
+import contextvars
+import itertools
+import os
+import random
+import statistics
+import time
+from collections import defaultdict
+from dotenv import load_dotenv
+from benchmarks.stand_ins import DisposableDatabase, FakeDictionaryServer, FakeTelegramServer, load_vocabulary
+
+BOT_TOKEN = '123456:BENCHMARK'
+FIRST_USER_ID = 900000000
+TRANSLATE_STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_translate_worker.js')
+# Вероятность правильного ответа в квизе
+ACCURACY = 0.7
+
+current_update = contextvars.ContextVar('current_update', default=None)
+
+
+class UpdateStats:
+    __slots__ = ('handler', 'queries')
+
+    def __init__(self):
+        self.handler = 'unhandled'
+        self.queries = 0
+
+
+def configure_environment(args, dictionary, telegram, database_name):
+    # Модули бота читают настройки при импорте, поэтому окружение задаётся до их загрузки
+    os.environ.update({
+        'BOT_TOKEN': BOT_TOKEN,
+        'TELEGRAM_API_URL': telegram.url,
+        'DICTIONARY_API_URL': dictionary.base_url,
+        'TRANSLATE_SCRIPT': TRANSLATE_STUB,
+        'FAKE_UPSTREAM_DELAY_MS': str(args.upstream_delay),
+        'POSTGRES_DB': database_name,
+        'ALLOWED_USER_ID': ', '.join(str(FIRST_USER_ID + index) for index in range(args.users)),
+        'INACTIVITY_TIMEOUT': '3600',
+        'WORKER_PROCESSES': '1',
+    })
+    if not args.snapshot:
+        os.environ['DICTIONARY_SNAPSHOT'] = ''
+    if not args.rate_limits:
+        # Лимиты Telegram на отправку измеряли бы очередь, а не обработчики
+        os.environ.update({'OUTBOUND_GLOBAL_RATE': '100000', 'OUTBOUND_CHAT_RATE': '100000',
+                           'OUTBOUND_CHAT_BURST': '100000'})
+
+
+class Harness:
+
+    def __init__(self, dp, bot, telegram):
+        self.dp = dp
+        self.bot = bot
+        self.telegram = telegram
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+
+    async def feed(self, payload):
+        from aiogram.types import Update
+        update = Update.model_validate({'update_id': next(self.update_ids), **payload}, context={'bot': self.bot})
+        stats = UpdateStats()
+        token = current_update.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, update)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            current_update.reset(token)
+        self.latencies[stats.handler].append(elapsed)
+        self.queries[stats.handler].append(stats.queries)
+
+    @staticmethod
+    def user(user_id):
+        return {'id': user_id, 'is_bot': False, 'first_name': 'Benchmark'}
+
+    async def send_text(self, user_id, text):
+        message = {'message_id': next(self.message_ids), 'date': int(time.time()),
+                   'chat': {'id': user_id, 'type': 'private'}, 'from': self.user(user_id), 'text': text}
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+        await self.feed({'message': message})
+
+    async def answer_poll(self, user_id, poll_id, option):
+        await self.feed({'poll_answer': {'poll_id': poll_id, 'user': self.user(user_id), 'option_ids': [option]}})
+
+    def context(self, user_id):
+        return self.dp.fsm.get_context(self.bot, chat_id=user_id, user_id=user_id)
+
+    async def state(self, user_id):
+        return await self.context(user_id).get_state()
+
+    async def run_flow(self, user_id, words, keyboards):
+        await self.send_text(user_id, '/start')
+        for word in words:
+            await self.send_text(user_id, keyboards['word_check'])
+            await self.send_text(user_id, word)
+            if await self.state(user_id) == 'BotRouters:new_word_printing':
+                await self.send_text(user_id, self.telegram.keyboards[user_id][0])
+            await self.send_text(user_id, keyboards['add'])
+
+        await self.send_text(user_id, keyboards['learn'])
+        while await self.state(user_id) == 'BotRouters:learn_words_choice':
+            await self.send_text(user_id, keyboards['next'])
+
+        if await self.state(user_id) == 'BotRouters:test_start':
+            await self.send_text(user_id, keyboards['quiz'])
+        while (state := await self.state(user_id)) in ('BotRouters:test_start', 'BotRouters:check_test'):
+            if state == 'BotRouters:check_test':
+                data = await self.context(user_id).get_data()
+                answer = data['right_answer'] if random.random() < ACCURACY else 'wrong'
+                await self.send_text(user_id, answer)
+            else:
+                poll_id, correct_option = self.telegram.polls.pop(user_id)
+                option = correct_option if random.random() < ACCURACY else (correct_option + 1) % 4
+                await self.answer_poll(user_id, poll_id, option)
+            await self.send_text(user_id, keyboards['next'])
+
+        await self.send_text(user_id, '/stats')
+
+    def report(self, wall_time, dictionary, telegram):
+        print(f"{'handler':<26} | {'updates':>7} | {'p50, ms':>8} | {'p95, ms':>8} | {'p99, ms':>8} | {'queries/update':>14}")
+        for handler, timings in sorted(self.latencies.items(), key=lambda item: -len(item[1])):
+            timings = sorted(timings)
+            print(f"{handler:<26} | {len(timings):>7} | {percentile(timings, 50):>8.2f} | "
+                  f"{percentile(timings, 95):>8.2f} | {percentile(timings, 99):>8.2f} | "
+                  f"{statistics.mean(self.queries[handler]):>14.2f}")
+        updates = sum(len(timings) for timings in self.latencies.values())
+        queries = sum(sum(counts) for counts in self.queries.values())
+        print(f"\n{updates} updates in {wall_time:.1f} s ({updates / wall_time:.1f} updates/s), "
+              f"{queries / updates:.2f} queries/update")
+        print(f"Upstream requests: dictionary {sum(dictionary.requests.values())}, "
+              f"Bot API {dict(telegram.requests)}")
+
+
+def percentile(timings, percent):
+    return timings[min(len(timings) - 1, int(len(timings) * percent / 100))]
+
+
+def count_queries(db):
+    # Каждый запрос обработчиков проходит через DB._run
+    run = db._run
+
+    async def counted_run(method, query, *args, **kwargs):
+        stats = current_update.get()
+        if stats is not None:
+            stats.queries += 1
+        return await run(method, query, *args, **kwargs)
+
+    db._run = counted_run
+
+
+async def label_handler(handler, event, data):
+    stats = current_update.get()
+    if stats is not None:
+        stats.handler = data['handler'].callback.__name__
+    return await handler(event, data)
+
+
+async def main(args):
+    load_dotenv()
+    vocabulary = load_vocabulary()
+    dictionary = await FakeDictionaryServer(vocabulary, args.upstream_delay / 1000).start()
+    telegram = await FakeTelegramServer(args.upstream_delay / 1000).start()
+    database = DisposableDatabase()
+    configure_environment(args, dictionary, telegram, await database.create())
+
+    import emoji
+    from aiogram import Dispatcher
+    from bot.bot_routers.bot_routers_main import BotRouters
+    from bot.fsm_storage import PostgresStorage
+    from bot.outbound_queue import outbound_queue
+    from dictionary.dictionary_snapshot import dictionary_snapshot
+    from dictionary.http_session import close_session
+    from dictionary.translate_worker_pool import close_pool
+
+    bot_handler = BotRouters()
+    storage = None
+    try:
+        await bot_handler.db.connect()
+        count_queries(bot_handler.db)
+        storage = PostgresStorage(bot_handler.db)
+        dp = Dispatcher(storage=storage)
+        dp.include_router(bot_handler.router)
+        dp.message.middleware(label_handler)
+        dp.poll_answer.middleware(label_handler)
+        harness = Harness(dp, bot_handler.bot, telegram)
+        keyboards = {'word_check': bot_handler.typing_handler.bot_texts['word_check'],
+                     'add': emoji.emojize(':plus:'),
+                     'learn': f'Learn {emoji.emojize(":nerd_face:")}',
+                     'next': emoji.emojize(':right_arrow:'),
+                     'quiz': bot_handler.typing_handler.keyboards['happy_face']}
+        user_ids = [FIRST_USER_ID + index for index in range(args.users)]
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            await asyncio.gather(*(harness.run_flow(user_id, random.sample(list(vocabulary), len(vocabulary)),
+                                                    keyboards) for user_id in user_ids))
+        harness.report(time.perf_counter() - started, dictionary, telegram)
+    finally:
+        await outbound_queue.close()
+        if storage is not None:
+            await storage.close()
+        await close_session()
+        await close_pool()
+        dictionary_snapshot.close()
+        await bot_handler.db.close()
+        await bot_handler.bot.session.close()
+        await dictionary.stop()
+        await telegram.stop()
+        await database.drop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Handler latency and queries per update on scripted user flows")
+    parser.add_argument('--users', type=int, default=10, help='concurrent users')
+    parser.add_argument('--rounds', type=int, default=1, help='flows per user')
+    parser.add_argument('--upstream-delay', type=float, default=0, help='latency of every stand-in, ms')
+    parser.add_argument('--snapshot', action='store_true', help='keep DICTIONARY_SNAPSHOT from the environment')
+    parser.add_argument('--rate-limits', action='store_true', help='keep OUTBOUND_* limits from the environment')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,52 @@
+// Заглушка google-translate-extended-api.js для бенчмарков: тот же протокол воркера
+// (JSON-запрос на строку в stdin, JSON-ответ на строку в stdout), ответы берутся из fixtures/vocabulary.json
+const fs = require('fs');
+const path = require('path');
+const readline = require('readline');
+
+const vocabulary = JSON.parse(fs.readFileSync(
+    process.env.FAKE_VOCABULARY || path.join(__dirname, 'fixtures', 'vocabulary.json'), 'utf8'));
+const delay = Number(process.env.FAKE_UPSTREAM_DELAY_MS || 0);
+
+function title(text) {
+    return text.charAt(0).toUpperCase() + text.slice(1);
+}
+
+function meaning(word) {
+    const entry = vocabulary[word];
+    if (!entry) {
+        return null;
+    }
+    const translations = {};
+    const definitions = {};
+    for (const [partOfSpeech, sense] of Object.entries(entry)) {
+        translations[title(partOfSpeech)] = sense.translations;
+        definitions[title(partOfSpeech)] = sense.definitions;
+    }
+    const first = Object.values(entry)[0];
+    return {word: word, translation: first.translations[0], translations: translations,
+            definitions: definitions, examples: []};
+}
+
+const rl = readline.createInterface({input: process.stdin, terminal: false});
+let pending = 0;
+let closed = false;
+
+rl.on('line', (line) => {
+    const request = JSON.parse(line);
+    pending += 1;
+    setTimeout(() => {
+        process.stdout.write(JSON.stringify({id: request.id, result: meaning(request.text)}) + '\n');
+        pending -= 1;
+        if (closed && pending === 0) {
+            process.exit(0);
+        }
+    }, delay);
+});
+
+rl.on('close', () => {
+    closed = true;
+    if (pending === 0) {
+        process.exit(0);
+    }
+});
@@ -0,0 +1,102 @@
+# Сравнение выборки случайных слов через ORDER BY RANDOM() и через rand_key на путях, которыми пользуется бот:
+# план раунда квиза (DB.plan_quiz_session) и слово дня (DB.select_words_of_the_day).
+# Запускать на отдельной тестовой БД (переменные окружения те же, что у бота):
+#   python -m benchmarks.random_sampling --sizes 1000 10000 100000 --runs 200
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+from db.db import DB
+
+BENCH_USER_ID = 'benchmark-random-sampling'
+CATEGORIES = ['Noun', 'Verb', 'Adjective', 'Adverb']
+STATUSES = ['New', 'Acquainted', 'Familiar', 'Reviewed', 'Memorized']
+QUIZ_STATUSES = ['Familiar', 'Reviewed']
+QUIZ_WORDS_COUNT = 5
+
+ORDER_BY_RANDOM_QUERIES = {
+    'quiz_round': "SELECT id, word, category, status FROM words WHERE user_id = $1 AND status = ANY($2::text[]) "
+                  "ORDER BY RANDOM() LIMIT $3;",
+    'word_of_day': "SELECT word, category FROM words WHERE user_id = $1 AND status <> 'New' "
+                   "ORDER BY RANDOM() LIMIT 1;",
+}
+
+
+async def fill_collection(db, size):
+    await db.execute("DELETE FROM words WHERE user_id = $1;", BENCH_USER_ID)
+    rows = [(uuid.uuid4(), f"word{i}", CATEGORIES[i % len(CATEGORIES)], STATUSES[i % len(STATUSES)], BENCH_USER_ID)
+            for i in range(size)]
+    async with db.pool.acquire() as conn:
+        await conn.copy_records_to_table('words', records=rows,
+                                         columns=['id', 'word', 'category', 'status', 'user_id'])
+        await conn.execute("ANALYZE words;")
+
+
+async def measure(coroutine_factory, runs, cleanup=None):
+    # cleanup выполняется после каждого прогона и в замер не входит
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await coroutine_factory()
+        timings.append((time.perf_counter() - started) * 1000)
+        if cleanup is not None:
+            await cleanup()
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+async def check_uniformity(db, draws):
+    # Слово дня на маленькой коллекции: перед каждым выбором ключи выдаются заново, поэтому частоты
+    # должны быть близки. Выводится отношение max/min; слова в статусе 'New' в выборку не входят
+    await fill_collection(db, 25)
+    counter = Counter()
+    for _ in range(draws):
+        for user_id, word, category in await db.select_words_of_the_day([BENCH_USER_ID]):
+            counter[word] += 1
+    return max(counter.values()) / min(counter.values()), len(counter)
+
+
+async def main(sizes, runs):
+    db = DB()
+    await db.connect()
+    await db.execute("INSERT INTO settings (user_id) VALUES ($1) ON CONFLICT (user_id) DO NOTHING;", BENCH_USER_ID)
+    try:
+        print(f"{'rows':>8} | {'query':<11} | {'ORDER BY RANDOM() p50/p95, ms':>30} | {'rand_key p50/p95, ms':>22}")
+        for size in sizes:
+            await fill_collection(db, size)
+            cases = {
+                # План раунда помечает слова 'Shown'; после замера они возвращаются в прежний статус
+                'quiz_round': (
+                    lambda: db.fetch(ORDER_BY_RANDOM_QUERIES['quiz_round'], BENCH_USER_ID, QUIZ_STATUSES,
+                                     QUIZ_WORDS_COUNT),
+                    lambda: db.plan_quiz_session(BENCH_USER_ID, QUIZ_STATUSES, QUIZ_WORDS_COUNT),
+                    lambda: db.select_shown_words(BENCH_USER_ID)
+                ),
+                # Вместе с ежедневной перевыдачей ключей всех слов пользователя
+                'word_of_day': (
+                    lambda: db.fetchrow(ORDER_BY_RANDOM_QUERIES['word_of_day'], BENCH_USER_ID),
+                    lambda: db.select_words_of_the_day([BENCH_USER_ID]),
+                    None
+                ),
+            }
+            for name, (baseline, sampled, cleanup) in cases.items():
+                baseline_p50, baseline_p95 = await measure(baseline, runs)
+                sampled_p50, sampled_p95 = await measure(sampled, runs, cleanup)
+                print(f"{size:>8} | {name:<11} | {baseline_p50:>14.3f} / {baseline_p95:<13.3f} | "
+                      f"{sampled_p50:>10.3f} / {sampled_p95:<9.3f}")
+        ratio, distinct = await check_uniformity(db, 20 * 500)
+        print(f"\nWord of the day over 20 words, 10000 draws: {distinct} distinct, max/min frequency = {ratio:.2f}")
+    finally:
+        await db.execute("DELETE FROM words WHERE user_id = $1;", BENCH_USER_ID)
+        await db.execute("DELETE FROM settings WHERE user_id = $1;", BENCH_USER_ID)
+        await db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Random word sampling latency against collection size")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.runs))
@@ -0,0 +1,149 @@
+# Локальные заменители внешних сервисов для бенчмарков: dictionaryapi.dev, Telegram Bot API и временная БД
+import asyncio
+import itertools
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter
+from aiohttp import web
+import asyncpg
+
+VOCABULARY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'vocabulary.json')
+
+
+def load_vocabulary(path=VOCABULARY_FILE):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+class StandInServer(ABC):
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = Counter()
+        self.runner = None
+        self.url = None
+
+    @abstractmethod
+    def routes(self, app):
+        pass
+
+    async def start(self):
+        app = web.Application()
+        self.routes(app)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+
+class FakeDictionaryServer(StandInServer):
+    # Ответы в формате dictionaryapi.dev: /api/v2/entries/en/<word>, 404 для неизвестных слов
+
+    def __init__(self, vocabulary, delay=0.0):
+        super().__init__(delay)
+        self.vocabulary = vocabulary
+
+    def routes(self, app):
+        app.router.add_get('/api/v2/entries/en/{word}', self.handle_entry)
+
+    @property
+    def base_url(self):
+        return self.url + '/api/v2/entries/en/'
+
+    async def handle_entry(self, request):
+        self.requests['entries'] += 1
+        await asyncio.sleep(self.delay)
+        word = request.match_info['word']
+        entry = self.vocabulary.get(word)
+        if entry is None:
+            return web.json_response({'title': 'No Definitions Found'}, status=404)
+        meanings = [{'partOfSpeech': part_of_speech,
+                     'definitions': [{'definition': definition, 'synonyms': [], 'antonyms': []}
+                                     for definition in sense['definitions']],
+                     'synonyms': [], 'antonyms': []}
+                    for part_of_speech, sense in entry.items()]
+        for meaning, sense in zip(meanings, entry.values()):
+            for definition, example in zip(meaning['definitions'], sense['examples']):
+                definition['example'] = example
+        return web.json_response([{'word': word, 'phonetic': f"/{word}/",
+                                   'phonetics': [{'text': f"/{word}/", 'audio': f"https://audio.invalid/{word}.mp3"}],
+                                   'meanings': meanings}])
+
+
+class FakeTelegramServer(StandInServer):
+    # Bot API: send* возвращают сообщение, остальные методы - True. Последняя клавиатура и опрос
+    # каждого чата запоминаются, чтобы сценарий мог "нажимать кнопки"
+    SEND_METHODS = {'sendmessage', 'sendpoll', 'sendaudio', 'sendvoice', 'sendphoto'}
+
+    def __init__(self, delay=0.0):
+        super().__init__(delay)
+        self.message_ids = itertools.count(1)
+        self.poll_ids = itertools.count(1)
+        self.keyboards = {}
+        self.polls = {}
+
+    def routes(self, app):
+        app.router.add_post('/bot{token}/{method}', self.handle_method)
+
+    async def handle_method(self, request):
+        method = request.match_info['method']
+        self.requests[method] += 1
+        await asyncio.sleep(self.delay)
+        form = await request.post()
+        if method.lower() == 'getme':
+            return web.json_response({'ok': True, 'result': {'id': 1, 'is_bot': True, 'first_name': 'Benchmark'}})
+        if method.lower() not in self.SEND_METHODS:
+            return web.json_response({'ok': True, 'result': True})
+
+        chat_id = int(form['chat_id'])
+        message = {'message_id': next(self.message_ids), 'date': int(time.time()),
+                   'chat': {'id': chat_id, 'type': 'private'}, 'text': form.get('text', '')}
+        if 'reply_markup' in form:
+            markup = json.loads(form['reply_markup'])
+            self.keyboards[chat_id] = [button['text'] for row in markup.get('keyboard', []) for button in row]
+        if method.lower() == 'sendpoll':
+            options = [option if isinstance(option, str) else option['text']
+                       for option in json.loads(form['options'])]
+            poll_id = str(next(self.poll_ids))
+            correct_option_id = int(form.get('correct_option_id', 0))
+            self.polls[chat_id] = (poll_id, correct_option_id)
+            message['poll'] = {'id': poll_id, 'question': form['question'],
+                               'options': [{'text': option, 'voter_count': 0} for option in options],
+                               'total_voter_count': 0, 'is_closed': False, 'is_anonymous': False,
+                               'type': 'quiz', 'allows_multiple_answers': False,
+                               'correct_option_id': correct_option_id}
+            del message['text']
+        return web.json_response({'ok': True, 'result': message})
+
+
+class DisposableDatabase:
+    # Отдельная БД на сервере из переменных окружения бота; удаляется после прогона вместе с данными
+
+    def __init__(self):
+        self.name = f"llb_bench_{uuid.uuid4().hex[:12]}"
+        self.maintenance_db = os.getenv('POSTGRES_DB')
+
+    async def _execute(self, query):
+        conn = await asyncpg.connect(database=self.maintenance_db, user=os.getenv('POSTGRES_USER'),
+                                     password=os.getenv('POSTGRES_PASSWORD'), host=os.getenv('DB_HOST'))
+        try:
+            await conn.execute(query)
+        finally:
+            await conn.close()
+
+    async def create(self):
+        await self._execute(f"CREATE DATABASE \"{self.name}\" TEMPLATE template0 ENCODING 'UTF8';")
+        return self.name
+
+    async def drop(self):
+        await self._execute(f'DROP DATABASE IF EXISTS "{self.name}" WITH (FORCE);')
@@ -1,16 +1,21 @@
 import random
 from bot.bot_typing_handler import BotTypingHandler
 from bot.bot_db_handler import BotDBHandler
+from bot.distractor_pool import DistractorPool
+from bot.quiz_prefetcher import QuizPrefetcher
 from db.db import DB
 from dictionary.my_dictionary_collaboration import LanguageProcessing
 from bot.bot_routers.bot_routers_main import BotRouters
 
 
 class BotQuizHandler:
-    def __init__(self, bot_typer: BotTypingHandler, db_handler: BotDBHandler, bot_db: DB):
+    def __init__(self, bot_typer: BotTypingHandler, db_handler: BotDBHandler, bot_db: DB,
+                 distractors: DistractorPool):
         self.bot_typer = bot_typer
         self.db_handler = db_handler
         self.db = bot_db
+        self.distractors = distractors
+        self.prefetcher = QuizPrefetcher(self.build_exercise)
 
     async def choose_word_for_quiz(self, state, mode, user_id):
         if mode == 'learn':
@@ -27,7 +32,7 @@ class BotQuizHandler:
         except KeyError:
             words_selection = {element: 0 for element in words}
 
-        max_selections = int(self.db.select_setting(user_id, 'quiz_exercises_count'))
+        max_selections = await self.db.select_setting(user_id, 'quiz_exercises_count')
         total_score = len(words_selection) * max_selections
         await state.update_data(total_score=total_score)
 
@@ -44,24 +49,29 @@ class BotQuizHandler:
     async def print_quiz_words(self, mode, message, state, words_list, flag):
         try:
             if mode == 'learn':
-                word_status = 'New/Acquainted'
+                word_statuses = ['New', 'Acquainted']
                 next_state = BotRouters.learn_words_choice
             else:  # mode == 'repeat'
-                word_status = 'Familiar/Reviewed'
+                word_statuses = ['Familiar', 'Reviewed']
                 next_state = BotRouters.repeat_words_choice
-            word_id, word, category, chosen_status = self.db.select_words_by_status(word_status,
-                                                                                    user_id=str(message.from_user.id))
-            self.db.update_word_status(word_id, 'Shown')
             if len(words_list) == 0:
+                # Слова всего раунда выбираются одним запросом в начале, дальше берутся из плана
+                user_id = str(message.from_user.id)
+                quiz_words_count = await self.db.select_setting(user_id, 'quiz_words_count')
+                quiz_plan = await self.db.plan_quiz_session(user_id, word_statuses, quiz_words_count)
                 old_statuses = {}
-                await state.update_data(old_statuses=old_statuses)
-            old_statuses = await self.bot_typer.get_state_info(state, 'old_statuses')
+                quiz_exercises_count = await self.db.select_setting(user_id, 'quiz_exercises_count')
+                self.prefetcher.start(user_id, quiz_plan, quiz_exercises_count)
+            else:
+                quiz_plan = await self.bot_typer.get_state_info(state, 'quiz_plan')
+                old_statuses = await self.bot_typer.get_state_info(state, 'old_statuses')
+            word_id, word, category, chosen_status = quiz_plan.pop(0)
             old_statuses[f'{word_id}'] = chosen_status
-            await state.update_data(old_statuses=old_statuses)
             words_list.append(word_id)
-            await state.update_data(**{f'words_to_{mode}': words_list})
+            await state.update_data(quiz_plan=quiz_plan, old_statuses=old_statuses,
+                                    **{f'words_to_{mode}': words_list})
 
-            word_obj = LanguageProcessing(word)
+            word_obj = await LanguageProcessing.fetch(word)
             definitions = word_obj.get_word_definitions(category)
             translation = word_obj.get_word_translations(category)
             print_definitions = self.bot_typer.prepare_sentences_for_print(definitions, category, translation)
@@ -83,11 +93,21 @@ class BotQuizHandler:
                     await state.set_state(BotRouters.repeat_start)
 
     async def get_exercise(self, message, state, word_id):
-        word_db_info = self.db.select_all_by_word_id(word_id)
-        word = word_db_info[1]
-        category = word_db_info[2]
-        word_info = LanguageProcessing(word)
+        user_id = str(message.from_user.id)
+        exercise = await self.prefetcher.pop(user_id, word_id)
+        if exercise is None:
+            word_db_info = await self.db.select_all_by_word_id(word_id)
+            word = word_db_info[1]
+            category = word_db_info[2]
+            word_info = await LanguageProcessing.fetch(word)
+            exercise = await self.build_exercise(user_id, word, category, word_info)
+        print_definitions, keyboard, word = exercise
+
+        await state.update_data(right_answer=word)
+
+        return print_definitions, keyboard
 
+    async def build_exercise(self, user_id, word, category, word_info):
         definitions = word_info.get_word_definitions(category)
         translations = word_info.get_word_translations(category)
         examples = word_info.get_word_examples(category)
@@ -114,30 +134,17 @@ class BotQuizHandler:
             print_definitions = self.bot_typer.prepare_sentences_for_print(replaced_examples, category)
 
         if chosen_input == 'buttons':
-            keyboard = [word]
-            count = self.db.select_count_by_category(category, user_id=str(message.from_user.id))
-            if count < 4:
+            distractors = await self.distractors.sample(user_id, category, word,
+                                                        prefer_similar_length=True)
+            if distractors is None:
                 keyboard = None
             else:
-                while len(keyboard) < 4:
-                    try:
-                        keyboard.append(self.db.select_random_row(category, user_id=str(message.from_user.id)))
-                        keyboard = list(set(keyboard))
-                        if len(keyboard) == 1:
-                            while len(keyboard) < 4:
-                                keyboard.append(self.db.select_random_row('All', user_id=str(message.from_user.id)))
-                                keyboard = list(set(keyboard))
-                            break
-                    except TypeError:
-                        keyboard.append(self.db.select_random_row(category, user_id=str(message.from_user.id)))
-                        keyboard = list(set(keyboard))
+                keyboard = [word] + distractors
                 random.shuffle(keyboard)
         else:
             keyboard = None
 
-        await state.update_data(right_answer=word)
-
-        return print_definitions, keyboard
+        return print_definitions, keyboard, word
 
     async def increase_score(self, state):
         try:
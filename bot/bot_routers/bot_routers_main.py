@@ -1,10 +1,15 @@
 from bot.bot_typing_handler import BotTypingHandler
+from bot.bot_db_handler import BotDBHandler
+from bot.telegram_session import TelegramSession
+from bot.distractor_pool import DistractorPool
+from bot.inactivity_tracker import InactivityTracker
+from bot.outbound_queue import outbound_queue, BACKGROUND
 from db.db import DB
+from dictionary.lexical_cache import lexical_cache
 from aiogram import Router, Bot
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
-import asyncio
 import os
 
 
@@ -29,13 +34,17 @@ class BotRouters(StatesGroup):
     def __init__(self):
         self.router = Router()
         self.bot_token = os.getenv('BOT_TOKEN')
-        self.bot = Bot(token=self.bot_token)
+        # Один Bot и один пул соединений к Bot API на все роутеры
+        self.bot = Bot(token=self.bot_token, session=TelegramSession())
         self.inactivity_timeout = int(os.getenv('INACTIVITY_TIMEOUT'))
         self.allowed_user_id = os.getenv('ALLOWED_USER_ID').split(', ')
-        self.user_timers = {}
+        self.inactivity_tracker = InactivityTracker(self.inactivity_timeout, self.handle_inactivity)
         self.router = Router()
         self.db = DB()
+        lexical_cache.bind(self.db)
+        self.distractors = DistractorPool(self.db)
         self.typing_handler = BotTypingHandler(self.db)
+        self.db_handler = BotDBHandler(self.typing_handler, self.db, self.distractors)
         self._initialize_routers()
 
     def _initialize_routers(self):
@@ -45,6 +54,8 @@ class BotRouters(StatesGroup):
         from bot.bot_routers.extra_features_routers import ExtraFeaturesRouters
         word_processing_routers = WordProcessingRouters(self)
         quiz_routers = QuizRouters(self.db, self)
+        # Нужен воркеру шарда: при перебалансировке он забывает заготовки квизов чужих пользователей
+        self.quiz_prefetcher = quiz_routers.quiz_handler.prefetcher
         settings_routers = SettingsRouters(self)
         extra_features_routers = ExtraFeaturesRouters(self)
 
@@ -55,18 +66,16 @@ class BotRouters(StatesGroup):
 
     async def user_authorized(self, message: Message):
         if str(message.from_user.id) not in self.allowed_user_id:
-            await message.answer("You are not authorized to use this bot.")
+            await outbound_queue.send(message.chat.id, lambda: message.answer("You are not authorized to use this bot."))
             return False
         return True
 
-    async def set_inactivity_timer(self, user_id, state: FSMContext):
-        async def handle_inactivity():
-            await asyncio.sleep(self.inactivity_timeout)
-            await state.set_state(self.start_mode_choice)
-            await self.bot.send_message(user_id, self.typing_handler.bot_texts['inactivity_text'],
-                                        reply_markup=self.typing_handler.show_keyboard(
-                                            self.typing_handler.keyboards['init']))
+    async def handle_inactivity(self, user_id, state: FSMContext):
+        await state.set_state(self.start_mode_choice)
+        await outbound_queue.send(user_id, lambda: self.bot.send_message(
+            user_id, self.typing_handler.bot_texts['inactivity_text'],
+            reply_markup=self.typing_handler.show_keyboard(self.typing_handler.keyboards['init'])
+        ), BACKGROUND)
 
-        if user_id in self.user_timers:
-            self.user_timers[user_id].cancel()
-        self.user_timers[user_id] = asyncio.create_task(handle_inactivity())
\ No newline at end of file
+    async def set_inactivity_timer(self, user_id, state: FSMContext):
+        self.inactivity_tracker.touch(user_id, state)
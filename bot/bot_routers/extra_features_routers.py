@@ -1,8 +1,7 @@
 import asyncio
-from aiogram import Bot, Router
+from aiogram import Router
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
-from datetime import datetime, timedelta
 from aiogram.types import Message
 from dotenv import load_dotenv
 from aiogram.enums import ParseMode
@@ -10,8 +9,8 @@ import emoji
 import os
 
 from dictionary.my_dictionary_collaboration import LanguageProcessing
-from bot.bot_typing_handler import BotTypingHandler
-from bot.bot_db_handler import BotDBHandler
+from bot.daily_scheduler import DailyScheduler
+from bot.outbound_queue import outbound_queue, BACKGROUND
 from bot.bot_routers.bot_routers_main import BotRouters
 
 load_dotenv()
@@ -20,75 +19,51 @@ load_dotenv()
 class ExtraFeaturesRouters:
     def __init__(self, bot_routers: BotRouters):
         self.bot_routers = bot_routers
-        self.bot_token = os.getenv('BOT_TOKEN')
-        self.bot = Bot(token=self.bot_token)
+        self.bot = self.bot_routers.bot
         self.router = Router()
         self.user_timers = {}
 
         # self.db = DB()
-        self.typing_handler = BotTypingHandler(self.bot_routers.db)
-        self.db_handler = BotDBHandler(self.typing_handler, self.bot_routers.db)
+        self.typing_handler = self.bot_routers.typing_handler
+        self.db_handler = self.bot_routers.db_handler
 
         self._setup_routes()
 
-        asyncio.create_task(self.send_daily_reminder())
-        asyncio.create_task(self.send_word_of_the_day())
+        # Одна куча на все ежедневные рассылки; настройки проверяются в момент срабатывания.
+        # При запуске в несколько процессов рассылками занимается только воркер 0.
+        user_ids = self.bot_routers.allowed_user_id
+        self.scheduler = DailyScheduler()
+        self.scheduler.add_job('daily_reminder', 17, 0, self.bot_routers.db.select_reminder_recipients,
+                               self.send_daily_reminder, user_ids)
+        self.scheduler.add_job('word_of_the_day', 9, 0, self.bot_routers.db.select_words_of_the_day,
+                               self.send_word_of_the_day, user_ids)
+        if os.getenv('BOT_SHARD_INDEX', '0') == '0':
+            asyncio.create_task(self.scheduler.run())
 
     def _setup_routes(self):
         self.router.message(Command("help"))(self.get_help)
         self.router.message(Command("stats"))(self.show_stats)
 
-    async def send_reminder_to_user(self, user_id):
-        while True:
-            now = datetime.now()
-            target_time = now.replace(hour=17, minute=0, second=0, microsecond=0)
-            if now > target_time:
-                target_time += timedelta(days=1)
-            wait_time = (target_time - now).total_seconds()
-            await asyncio.sleep(wait_time)
-            message_needed = self.bot_routers.db.select_date_delta(user_id)
-            reminder_enabled = self.bot_routers.db.select_setting(user_id, 'daily_reminder')
-            if message_needed and reminder_enabled:
-                await self.bot.send_message(user_id, self.typing_handler.bot_texts['daily_reminder'])
-
-    async def send_daily_reminder(self):
-        user_ids = self.bot_routers.allowed_user_id
-        tasks = [asyncio.create_task(self.send_reminder_to_user(user_id)) for user_id in user_ids]
-        await asyncio.gather(*tasks)
+    async def send_daily_reminder(self, user_id):
+        await outbound_queue.send(user_id, lambda: self.bot.send_message(
+            user_id, self.typing_handler.bot_texts['daily_reminder']
+        ), BACKGROUND)
 
-    async def send_word_of_the_day_to_user(self, user_id):
-        while True:
-            now = datetime.now()
-            target_time = now.replace(hour=9, minute=0, second=0, microsecond=0)
-            if now > target_time:
-                target_time += timedelta(days=1)
-            wait_time = (target_time - now).total_seconds()
-            await asyncio.sleep(wait_time)
-            notification_enabled = self.bot_routers.db.select_setting(user_id, 'word_of_the_day')
-            if notification_enabled:
-                word_info = self.bot_routers.db.select_word_of_the_day(user_id)
-                if word_info:
-                    word = word_info[0]
-                    category = word_info[1]
-                    word_handling = LanguageProcessing(word)
-                    if category == 'Expression':
-                        translation = word_handling.get_word_translations(category)
-                        print_definitions = self.typing_handler.prepare_sentences_for_print(None, category, translation)
-                    else:
-                        definitions = word_handling.get_word_definitions(category)
-                        translation = word_handling.get_word_translations(category)
-                        print_definitions = self.typing_handler.prepare_sentences_for_print(definitions, category,
-                                                                                            translation)
-                    await self.bot.send_message(
-                        user_id,
-                        f"Today's word of the day is <b>{word}</b>!\n\n{print_definitions}",
-                        parse_mode=ParseMode.HTML
-                    )
-
-    async def send_word_of_the_day(self):
-        user_ids = self.bot_routers.allowed_user_id
-        tasks = [asyncio.create_task(self.send_word_of_the_day_to_user(user_id)) for user_id in user_ids]
-        await asyncio.gather(*tasks)
+    async def send_word_of_the_day(self, user_id, word, category):
+        word_handling = await LanguageProcessing.fetch(word)
+        if category == 'Expression':
+            translation = word_handling.get_word_translations(category)
+            print_definitions = self.typing_handler.prepare_sentences_for_print(None, category, translation)
+        else:
+            definitions = word_handling.get_word_definitions(category)
+            translation = word_handling.get_word_translations(category)
+            print_definitions = self.typing_handler.prepare_sentences_for_print(definitions, category,
+                                                                                translation)
+        await outbound_queue.send(user_id, lambda: self.bot.send_message(
+            user_id,
+            f"Today's word of the day is <b>{word}</b>!\n\n{print_definitions}",
+            parse_mode=ParseMode.HTML
+        ), BACKGROUND)
 
     async def get_help(self, message: Message, state: FSMContext):
         if not await self.bot_routers.user_authorized(message):
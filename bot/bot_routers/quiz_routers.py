@@ -1,16 +1,14 @@
-from aiogram import Bot, F, Router
+from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
 from dotenv import load_dotenv
 import emoji
-import os
 from aiogram.enums import PollType
 from aiogram import types
 
-from bot.bot_typing_handler import BotTypingHandler
 from bot.bot_quiz_handler import BotQuizHandler
-from bot.bot_db_handler import BotDBHandler
 from bot.bot_routers.bot_routers_main import BotRouters
+from bot.outbound_queue import outbound_queue
 import re
 from db.db import DB
 
@@ -21,13 +19,13 @@ class QuizRouters:
     def __init__(self, db: DB, bot_routers: BotRouters):
         self.bot_routers = bot_routers
         self.db = db
-        self.bot_token = os.getenv('BOT_TOKEN')
-        self.bot = Bot(token=self.bot_token)
+        self.bot = self.bot_routers.bot
         self.router = Router()
         self.active_quizzes = {}
-        self.typing_handler = BotTypingHandler(self.db)
-        self.db_handler = BotDBHandler(self.typing_handler, self.db)
-        self.quiz_handler = BotQuizHandler(self.typing_handler, self.db_handler, self.db)
+        self.typing_handler = self.bot_routers.typing_handler
+        self.db_handler = self.bot_routers.db_handler
+        self.quiz_handler = BotQuizHandler(self.typing_handler, self.db_handler, self.db,
+                                           self.bot_routers.distractors)
         self._setup_routes()
 
     def _setup_routes(self):
@@ -59,8 +57,8 @@ class QuizRouters:
         if not isinstance(words, list):
             words = []
         user_id = str(message.from_user.id)
-        quiz_words_count = self.db.select_setting(user_id, 'quiz_words_count')
-        if len(words) < int(quiz_words_count):
+        quiz_words_count = await self.db.select_setting(user_id, 'quiz_words_count')
+        if len(words) < quiz_words_count:
             await self.quiz_handler.print_quiz_words(mode, message, state, words, 0)
         else:
             await self.typing_handler.type_reply(message, self.typing_handler.bot_texts['words_ended'],
@@ -77,8 +75,8 @@ class QuizRouters:
         await self.bot_routers.set_inactivity_timer(message.from_user.id, state)
         words = await self.typing_handler.get_state_info(state, words_key)
         user_id = str(message.from_user.id)
-        quiz_words_count = self.db.select_setting(user_id, 'quiz_words_count')
-        if len(words) < int(quiz_words_count):
+        quiz_words_count = await self.db.select_setting(user_id, 'quiz_words_count')
+        if len(words) < quiz_words_count:
             await self.quiz_handler.print_quiz_words(mode, message, state, words, 1)
         else:
             await self.db_handler.revert_statuses(state)
@@ -102,7 +100,7 @@ class QuizRouters:
                 right_answer = await self.typing_handler.get_state_info(state, 'right_answer')
                 right_answer_index = int(keyboard.index(right_answer))
                 question = re.sub(r'</?([bi])>', '', print_definitions)
-                poll_message = await self.bot.send_poll(
+                poll_message = await outbound_queue.send(message.chat.id, lambda: self.bot.send_poll(
                     chat_id=message.chat.id,
                     question=question,
                     options=keyboard,
@@ -110,7 +108,7 @@ class QuizRouters:
                     correct_option_id=right_answer_index,
                     explanation=f"The correct answer is {right_answer}.",
                     is_anonymous=False
-                )
+                ))
                 self.active_quizzes[poll_message.poll.id] = right_answer_index
             else:
                 await self.typing_handler.type_reply(message, f"{print_definitions}", keyboard)
@@ -118,6 +116,7 @@ class QuizRouters:
         else:
             await self.quiz_handler.print_score(state, message)
             await self.quiz_handler.buffer_clear_out(state, mode)
+            self.quiz_handler.prefetcher.discard(user_id)
             await state.set_state(self.bot_routers.start_mode_choice)
 
     async def check_chosen_option(self, message: Message, state: FSMContext):
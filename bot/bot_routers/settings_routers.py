@@ -1,12 +1,9 @@
-from aiogram import Bot, F, Router
+from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
 from dotenv import load_dotenv
-import os
 
-from bot.bot_typing_handler import BotTypingHandler
-from bot.bot_db_handler import BotDBHandler
 from bot.bot_routers.bot_routers_main import BotRouters
 
 load_dotenv()
@@ -15,13 +12,12 @@ load_dotenv()
 class SettingsRouters:
     def __init__(self, bot_routers: BotRouters):
         self.bot_routers = bot_routers
-        self.bot_token = os.getenv('BOT_TOKEN')
-        self.bot = Bot(token=self.bot_token)
+        self.bot = self.bot_routers.bot
         self.router = Router()
         self.user_timers = {}
 
-        self.typing_handler = BotTypingHandler(self.bot_routers.db)
-        self.db_handler = BotDBHandler(self.typing_handler, self.bot_routers.db)
+        self.typing_handler = self.bot_routers.typing_handler
+        self.db_handler = self.bot_routers.db_handler
 
         self._setup_routes()
 
@@ -1,14 +1,11 @@
-from aiogram import Bot, F, Router
+from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
 from dotenv import load_dotenv
 import emoji
-import os
 
 from dictionary.my_dictionary_collaboration import LanguageProcessing
-from bot.bot_typing_handler import BotTypingHandler
-from bot.bot_db_handler import BotDBHandler
 from bot.bot_routers.bot_routers_main import BotRouters
 
 load_dotenv()
@@ -17,12 +14,11 @@ load_dotenv()
 class WordProcessingRouters:
     def __init__(self, bot_routers: BotRouters):
         self.bot_routers = bot_routers
-        self.bot_token = os.getenv('BOT_TOKEN')
-        self.bot = Bot(token=self.bot_token)
+        self.bot = self.bot_routers.bot
         self.router = Router()
         self.user_timers = {}
-        self.typing_handler = BotTypingHandler(self.bot_routers.db)
-        self.db_handler = BotDBHandler(self.typing_handler, self.bot_routers.db)
+        self.typing_handler = self.bot_routers.typing_handler
+        self.db_handler = self.bot_routers.db_handler
         self._setup_routes()
 
     def _setup_routes(self):
@@ -61,7 +57,7 @@ class WordProcessingRouters:
             return
         await self.typing_handler.type_answer(message, self.typing_handler.bot_texts['welcome'],
                                               self.typing_handler.keyboards['init'])
-        await self.db_handler.check_lost_words()
+        await self.db_handler.check_lost_words(str(message.from_user.id))
         await self.db_handler.add_user_settings(str(message.from_user.id))
         await state.set_state(self.bot_routers.start_mode_choice)
         await self.bot_routers.set_inactivity_timer(message.from_user.id, state)
@@ -76,7 +72,7 @@ class WordProcessingRouters:
         await state.update_data(word=message.text.lower())
 
         new_word = await self.typing_handler.get_state_info(state, 'word')
-        word_info = LanguageProcessing(new_word)
+        word_info = await LanguageProcessing.fetch(new_word)
 
         if word_info.check_definitions() is None:
             if new_word.count(' ') != 0:  # если это выражение из нескольких слов
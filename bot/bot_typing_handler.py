@@ -2,6 +2,8 @@ from aiogram import types
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from aiogram.enums import ParseMode
 import emoji
+from bot.card_renderer import render_card
+from bot.outbound_queue import outbound_queue
 from dictionary.my_dictionary_collaboration import LanguageProcessing
 from db.db import DB
 
@@ -63,96 +65,38 @@ class BotTypingHandler:
 
     async def type_answer(self, message, answer, buttons=None):
         if buttons:
-            await message.answer(
+            await outbound_queue.send(message.chat.id, lambda: message.answer(
                 text=f"{answer}",
                 reply_markup=self.show_keyboard(buttons),
                 parse_mode=ParseMode.HTML
-            )
+            ))
         else:
-            await message.answer(
+            await outbound_queue.send(message.chat.id, lambda: message.answer(
                 text=f"{answer}",
                 parse_mode=ParseMode.HTML
-            )
+            ))
 
     async def type_reply(self, message, reply, buttons=None):
         if buttons:
-            await message.reply(
+            await outbound_queue.send(message.chat.id, lambda: message.reply(
                 text=f"{reply}",
                 reply_markup=self.show_keyboard(buttons),
                 parse_mode=ParseMode.HTML
-            )
+            ))
         else:
-            await message.reply(
+            await outbound_queue.send(message.chat.id, lambda: message.reply(
                 text=f"{reply}",
                 reply_markup=types.ReplyKeyboardRemove(),
                 parse_mode=ParseMode.HTML
-            )
+            ))
 
     @staticmethod
     def prepare_sentences_for_print(sentences, choice, translations=None):
-        if isinstance(sentences, list):
-            print_sentences = [f"- {s.rstrip('.').capitalize()}" for s in sentences]
-            if not translations:
-                return f"<b>{choice.capitalize()}</b>:\n" + "\n".join(print_sentences)
-            else:
-                if isinstance(translations, list):
-                    if len(translations) > 1:
-                        return f"<b>{choice.capitalize()}</b>:\n" + "\n".join(
-                            print_sentences) + '\n\n<i>' + f'{translations[0].capitalize()}' + ', ' + ', '.join(
-                            translations[1:]) + '</i>'
-                    else:
-                        return f"<b>{choice.capitalize()}</b>:\n" + "\n".join(
-                            print_sentences) + '\n\n<i>' + f'{translations[0].capitalize()}' + '</i>'
-                elif isinstance(translations, str):
-                    return f"<b>{choice.capitalize()}</b>:\n" + "\n".join(
-                        print_sentences) + f'<i>\n\n{translations.capitalize()}</i>'
-        elif isinstance(sentences, dict):
-            print_sentences = []
-            for key in sentences.keys():
-                print_sentences.append(f"\n<b>{key.capitalize()}:</b>")
-                for key_, value in sentences.items():
-                    if key == key_:
-                        print_sentences += [f"- {s.rstrip('.').capitalize()}" for s in value]
-                        if translations:
-                            if isinstance(translations, dict):
-                                if key in translations.keys():
-                                    if len(translations[key]) > 1:
-                                        print_translations = '\n<i>' + translations[key][
-                                            0].capitalize() + ', ' + ', '.join(translations[key][1:]) + '</i>'
-                                    else:
-                                        print_translations = '\n<i>' + translations[key][0].capitalize() + '</i>'
-                                    print_sentences.append(print_translations)
-                                else:
-                                    pass
-                            elif isinstance(translations, str):
-                                print_translations = '\n<i>' + translations.capitalize() + '</i>'
-                                print_sentences.append(print_translations)
-            return "\n".join(print_sentences)
-        elif not sentences:
-            if translations:
-                print_sentences = []
-                if isinstance(translations, dict):
-                    for key in translations.keys():
-                        if len(translations[key]) > 1:
-                            print_translations = '<i>' + translations[key][0].capitalize() + ', ' + ', '.join(
-                                translations[key][1:]) + '</i>'
-                        else:
-                            print_translations = '\n<i>' + translations[key][0].capitalize() + '</i>'
-                        print_sentences.append(print_translations)
-                elif isinstance(translations, str):
-                    print_translations = '<i>' + translations.capitalize() + '</i>'
-                    print_sentences.append(print_translations)
-                elif isinstance(translations, list):
-                    print_translations = '<i>' + ', '.join(translations).capitalize() + '</i>'
-                    # capitalized = print_translations[0].upper() + print_translations[1:]
-                    print_sentences.append(print_translations)
-                return "\n".join(print_sentences)
-            else:
-                return ''
+        return render_card(sentences, choice, translations)
 
     async def type_word_info(self, message, state, choice, definitions=None):
         new_word = await self.get_state_info(state, 'word')
-        word = LanguageProcessing(new_word)
+        word = await LanguageProcessing.fetch(new_word)
         if definitions:
             definitions = word.get_word_definitions(choice)
             translation = word.get_word_translations(choice)
@@ -174,7 +118,7 @@ class BotTypingHandler:
             part_of_speech = await self.get_state_info(state, 'pt_of_speech')
             word = await self.get_state_info(state, 'word')
 
-            word_info = LanguageProcessing(word)
+            word_info = await LanguageProcessing.fetch(word)
             examples = word_info.get_word_examples(part_of_speech)
             print_examples = self.prepare_sentences_for_print(examples, part_of_speech)
             await state.update_data(examples=examples)
@@ -194,10 +138,10 @@ class BotTypingHandler:
             elif mode == 'repeat':
                 words = await self.get_state_info(state, 'words_to_repeat')
             word_id = words[-1]
-            word_db_info = self.db.select_all_by_word_id(word_id)
+            word_db_info = await self.db.select_all_by_word_id(word_id)
             word = word_db_info[1]
             category = word_db_info[2]
-            word_info = LanguageProcessing(word)
+            word_info = await LanguageProcessing.fetch(word)
             examples = word_info.get_word_examples(category)
             print_examples = self.prepare_sentences_for_print(examples, category)
             audio_link = word_info.get_audio()
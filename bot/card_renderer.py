@@ -0,0 +1,82 @@
+import os
+from functools import lru_cache
+from monitoring.metrics import registry
+
+CACHE_ENTRIES = int(os.getenv('CARD_CACHE_ENTRIES', '4096'))
+
+
+def _freeze(value):
+    # Неизменяемый слепок содержимого карточки: по нему кэш и различает карточки
+    if isinstance(value, dict):
+        return 'dict', tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return 'list', tuple(_freeze(item) for item in value)
+    return value
+
+
+def _is_container(value, kind):
+    return isinstance(value, tuple) and value[0] == kind
+
+
+def _is_empty(value):
+    if isinstance(value, tuple):
+        return not value[1]
+    return not value
+
+
+def _sentence_lines(sentences):
+    return [f"- {sentence.rstrip('.').capitalize()}" for sentence in sentences]
+
+
+def _translation_line(translations):
+    return ', '.join((translations[0].capitalize(), *translations[1:]))
+
+
+@lru_cache(maxsize=CACHE_ENTRIES)
+def _render(sentences, choice, translations):
+    if _is_container(sentences, 'list'):
+        card = f"<b>{choice.capitalize()}</b>:\n" + "\n".join(_sentence_lines(sentences[1]))
+        if _is_empty(translations):
+            return card
+        if _is_container(translations, 'list'):
+            return card + '\n\n<i>' + _translation_line(translations[1]) + '</i>'
+        if isinstance(translations, str):
+            return card + f'<i>\n\n{translations.capitalize()}</i>'
+        return None
+    if _is_container(sentences, 'dict'):
+        translations_by_key = dict(translations[1]) if _is_container(translations, 'dict') else None
+        lines = []
+        for key, values in sentences[1]:
+            lines.append(f"\n<b>{key.capitalize()}:</b>")
+            lines += _sentence_lines(values[1])
+            if _is_empty(translations):
+                continue
+            if translations_by_key is not None:
+                if key in translations_by_key:
+                    lines.append('\n<i>' + _translation_line(translations_by_key[key][1]) + '</i>')
+            elif isinstance(translations, str):
+                lines.append('\n<i>' + translations.capitalize() + '</i>')
+        return "\n".join(lines)
+    if _is_empty(sentences):
+        if _is_empty(translations):
+            return ''
+        lines = []
+        if _is_container(translations, 'dict'):
+            for key, values in translations[1]:
+                if len(values[1]) > 1:
+                    lines.append('<i>' + _translation_line(values[1]) + '</i>')
+                else:
+                    lines.append('\n<i>' + values[1][0].capitalize() + '</i>')
+        elif isinstance(translations, str):
+            lines.append('<i>' + translations.capitalize() + '</i>')
+        elif _is_container(translations, 'list'):
+            lines.append('<i>' + ', '.join(translations[1]).capitalize() + '</i>')
+        return "\n".join(lines)
+    return None
+
+
+def render_card(sentences, choice, translations=None):
+    return _render(_freeze(sentences), choice, _freeze(translations))
+
+
+registry.gauge_source('bot_card_cache', lambda: _render.cache_info()._asdict())
@@ -0,0 +1,82 @@
+import asyncio
+import heapq
+import logging
+import os
+from datetime import datetime, timedelta
+
+
+class DailyScheduler:
+    logger = logging.getLogger("DailyScheduler")
+
+    def __init__(self, workers=None):
+        self.workers = workers or int(os.getenv('SCHEDULER_WORKERS', '8'))
+        # Куча (время срабатывания, user_id, задача): спим до ближайшего срабатывания
+        self.heap = []
+        # имя задачи -> (час, минута, выбор получателей, отправка)
+        self.jobs = {}
+        self.queue = asyncio.Queue()
+        self.wakeup = asyncio.Event()
+
+    @staticmethod
+    def _next_fire_time(hour, minute, now=None):
+        now = now or datetime.now()
+        fire_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if fire_time <= now:
+            fire_time += timedelta(days=1)
+        return fire_time
+
+    def add_job(self, name, hour, minute, select_due, send, user_ids):
+        # select_due(user_ids) одним запросом возвращает кортежи аргументов send для всех, кому пора отправлять
+        self.jobs[name] = (hour, minute, select_due, send)
+        fire_time = self._next_fire_time(hour, minute)
+        for user_id in user_ids:
+            heapq.heappush(self.heap, (fire_time, user_id, name))
+        self.wakeup.set()
+
+    async def run(self):
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            while True:
+                await self._sleep_until_due()
+                now = datetime.now()
+                due = {}
+                while self.heap and self.heap[0][0] <= now:
+                    fire_time, user_id, name = heapq.heappop(self.heap)
+                    due.setdefault(name, []).append(user_id)
+                    hour, minute = self.jobs[name][:2]
+                    heapq.heappush(self.heap, (self._next_fire_time(hour, minute, now), user_id, name))
+                for name, user_ids in due.items():
+                    await self._dispatch(name, user_ids)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def _sleep_until_due(self):
+        self.wakeup.clear()
+        delay = (self.heap[0][0] - datetime.now()).total_seconds() if self.heap else None
+        if delay is None or delay > 0:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch(self, name, user_ids):
+        select_due, send = self.jobs[name][2:]
+        try:
+            recipients = await select_due(user_ids)
+        except Exception as e:
+            self.logger.error(f"Failed to select recipients for '{name}': {e}")
+            return
+        self.logger.info(f"Job '{name}': {len(recipients)} of {len(user_ids)} users are due.")
+        for args in recipients:
+            self.queue.put_nowait((name, send, args))
+
+    async def _worker(self):
+        while True:
+            name, send, args = await self.queue.get()
+            try:
+                await send(*args)
+            except Exception as e:
+                self.logger.error(f"Job '{name}' failed for {args}: {e}")
+            finally:
+                self.queue.task_done()
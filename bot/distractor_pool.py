@@ -0,0 +1,44 @@
+import random
+from bisect import bisect_left
+from collections import OrderedDict
+from db.db import DB
+
+
+class DistractorPool:
+    MAX_USERS = 1024
+
+    def __init__(self, bot_db: DB, max_users=MAX_USERS):
+        self.db = bot_db
+        self.max_users = max_users
+        # user_id -> {категория: (слова по возрастанию длины, множество слов)}; 'All' - все слова пользователя
+        self.pools = OrderedDict()
+
+    async def _get_user_pools(self, user_id):
+        pools = self.pools.get(user_id)
+        if pools is None:
+            pools = {}
+            for word, category in await self.db.select_user_words(user_id):
+                pools.setdefault(category, set()).add(word)
+                pools.setdefault('All', set()).add(word)
+            pools = {category: (sorted(words, key=len), words) for category, words in pools.items()}
+            self.pools[user_id] = pools
+            while len(self.pools) > self.max_users:
+                self.pools.popitem(last=False)
+        self.pools.move_to_end(user_id)
+        return pools
+
+    def invalidate(self, user_id):
+        self.pools.pop(user_id, None)
+
+    async def sample(self, user_id, category, answer, k=3, prefer_similar_length=False):
+        # k разных слов той же части речи, кроме правильного ответа; None, если слов не хватает
+        words, word_set = (await self._get_user_pools(user_id)).get(category, ([], set()))
+        if len(words) - (answer in word_set) < k:
+            return None
+        if prefer_similar_length:
+            # Окно из соседних по длине слов: варианты ответа нельзя угадать по длине
+            position = bisect_left(words, len(answer), key=len)
+            start = max(0, min(position - k * 2, len(words) - k * 4))
+            words = words[start:start + k * 4]
+        picked = [word for word in random.sample(words, min(k + 1, len(words))) if word != answer]
+        return picked[:k]
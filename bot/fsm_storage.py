@@ -0,0 +1,104 @@
+import asyncio
+import copy
+import logging
+import os
+from collections import OrderedDict
+from itertools import islice
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder
+from db.db import DB
+
+
+class PostgresStorage(BaseStorage):
+    logger = logging.getLogger("PostgresStorage")
+
+    def __init__(self, bot_db: DB, key_builder: KeyBuilder = None):
+        self.db = bot_db
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self.flush_interval = float(os.getenv('FSM_FLUSH_INTERVAL', '1'))
+        self.max_cached = int(os.getenv('FSM_CACHE_ENTRIES', '10000'))
+        # key -> [state, data]; горячее состояние живёт в памяти, в БД пишется с задержкой
+        self.records = OrderedDict()
+        self.dirty = set()
+        self.flush_lock = asyncio.Lock()
+        self.flusher = None
+
+    async def _get_record(self, key):
+        storage_key = self.key_builder.build(key)
+        record = self.records.get(storage_key)
+        if record is None:
+            row = await self.db.select_fsm_record(storage_key)
+            loaded = [row[0], row[1]] if row else [None, {}]
+            # Пока шёл запрос, запись могла появиться из set_state/set_data — она свежее
+            record = self.records.setdefault(storage_key, loaded)
+            self._evict()
+        self.records.move_to_end(storage_key)
+        return storage_key, record
+
+    def _evict(self):
+        # Вытесняются только сброшенные в БД записи
+        excess = len(self.records) - self.max_cached
+        if excess > 0:
+            oldest = islice(self.records, excess + len(self.dirty))
+            for storage_key in [storage_key for storage_key in oldest if storage_key not in self.dirty][:excess]:
+                del self.records[storage_key]
+
+    def _mark_dirty(self, storage_key):
+        self.dirty.add(storage_key)
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Все update_data за интервал сливаются в одну запись на ключ
+        while self.dirty:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        async with self.flush_lock:
+            if not self.dirty:
+                return
+            keys, self.dirty = self.dirty, set()
+            # Ключ без записи в памяти сохранять нечем: пропускаем, а не роняем фоновый сброс
+            records = [(storage_key, *self.records[storage_key]) for storage_key in keys
+                       if storage_key in self.records]
+            try:
+                await self.db.save_fsm_records(records)
+            except Exception as e:
+                self.logger.error(f"Failed to flush {len(records)} FSM records: {e}")
+                self.dirty |= keys
+            except asyncio.CancelledError:
+                # Фоновый сброс отменили посреди записи: ключи вернутся в dirty и сохранятся при закрытии
+                self.dirty |= keys
+                raise
+
+    async def reset(self):
+        # Сбросить изменения в БД и забыть кэш: состояние могло переехать в другой процесс.
+        # Несохранённые после неудачного сброса записи остаются, иначе изменения пропадут
+        await self.flush()
+        for storage_key in [storage_key for storage_key in self.records if storage_key not in self.dirty]:
+            del self.records[storage_key]
+
+    async def set_state(self, key, state=None):
+        storage_key, record = await self._get_record(key)
+        record[0] = state.state if isinstance(state, State) else state
+        self._mark_dirty(storage_key)
+
+    async def get_state(self, key):
+        storage_key, record = await self._get_record(key)
+        return record[0]
+
+    async def set_data(self, key, data):
+        storage_key, record = await self._get_record(key)
+        record[1] = copy.deepcopy(data)
+        self._mark_dirty(storage_key)
+
+    async def get_data(self, key):
+        storage_key, record = await self._get_record(key)
+        return copy.deepcopy(record[1])
+
+    async def close(self):
+        if self.flusher is not None:
+            self.flusher.cancel()
+            await asyncio.gather(self.flusher, return_exceptions=True)
+        await self.flush()
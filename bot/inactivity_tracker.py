@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import math
+import os
+
+
+class InactivityTracker:
+    logger = logging.getLogger("InactivityTracker")
+
+    def __init__(self, timeout, on_expire, tick=None):
+        # on_expire(user_id, state) вызывается один раз после timeout секунд без сообщений
+        self.tick = tick or float(os.getenv('INACTIVITY_TICK', '1'))
+        self.on_expire = on_expire
+        # Хешированное колесо таймеров: слот = номер тика срабатывания по модулю числа слотов.
+        # Таймаут один для всех, поэтому любой дедлайн помещается в один оборот колеса.
+        self.span = max(1, math.ceil(timeout / self.tick))
+        self.slots = [set() for _ in range(self.span + 1)]
+        # user_id -> [слот, FSMContext]
+        self.users = {}
+        self.current_tick = 0
+        self.driver = None
+
+    def touch(self, user_id, state):
+        # O(1): пользователь переносится в слот нового дедлайна, без создания задач
+        entry = self.users.get(user_id)
+        if entry is not None:
+            self.slots[entry[0]].discard(user_id)
+        slot = (self.current_tick + self.span) % len(self.slots)
+        self.slots[slot].add(user_id)
+        self.users[user_id] = [slot, state]
+        if self.driver is None or self.driver.done():
+            self.driver = asyncio.create_task(self._drive())
+
+    def forget(self, user_id):
+        entry = self.users.pop(user_id, None)
+        if entry is not None:
+            self.slots[entry[0]].discard(user_id)
+
+    async def _drive(self):
+        loop = asyncio.get_running_loop()
+        next_tick_at = loop.time() + self.tick
+        while self.users:
+            await asyncio.sleep(max(0.0, next_tick_at - loop.time()))
+            next_tick_at += self.tick
+            self.current_tick += 1
+            slot = self.slots[self.current_tick % len(self.slots)]
+            expired = list(slot)
+            slot.clear()
+            for user_id in expired:
+                state = self.users.pop(user_id)[1]
+                asyncio.create_task(self._expire(user_id, state))
+
+    async def _expire(self, user_id, state):
+        try:
+            await self.on_expire(user_id, state)
+        except Exception as e:
+            self.logger.error(f"Failed to handle inactivity of user {user_id}: {e}")
@@ -0,0 +1,42 @@
+import logging
+import time
+from aiogram import BaseMiddleware, Dispatcher
+from monitoring.metrics import current_trace, handler_seconds, timed, update_seconds, UpdateTrace, TRACE_THRESHOLD
+
+
+class UpdateTracing(BaseMiddleware):
+    # Внешний middleware на update: время всего обновления и трассировка, которую пополняют БД, источники и Bot API
+    logger = logging.getLogger("UpdateTracing")
+
+    async def __call__(self, handler, event, data):
+        trace = UpdateTrace(event.update_id)
+        token = current_trace.set(trace)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_trace.reset(token)
+            update_seconds.observe(elapsed, trace.handler)
+            if elapsed >= TRACE_THRESHOLD:
+                self.logger.info(f"Slow update. {trace.summary(elapsed)}")
+            else:
+                self.logger.debug(trace.summary(elapsed))
+
+
+class HandlerTiming(BaseMiddleware):
+
+    async def __call__(self, handler, event, data):
+        name = data['handler'].callback.__name__
+        trace = current_trace.get()
+        if trace is not None:
+            trace.handler = name
+        with timed(handler_seconds, name):
+            return await handler(event, data)
+
+
+def setup_metrics(dp: Dispatcher):
+    dp.update.outer_middleware(UpdateTracing())
+    # Внутренние middleware диспетчера действуют и во вложенных роутерах
+    for observer in (dp.message, dp.poll_answer):
+        observer.middleware(HandlerTiming())
@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import logging
+import os
+import time
+from collections import deque
+from aiogram.exceptions import TelegramRetryAfter
+from dotenv import load_dotenv
+from monitoring.metrics import outbound_seconds, registry, timed
+
+load_dotenv()
+
+# Очереди приоритетов: ответы пользователю уходят раньше рассылок
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = ('interactive', 'background')
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def delay(self):
+        # Через сколько секунд появится токен (0 - уже есть)
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def idle(self):
+        return self.delay() == 0 and self.tokens >= self.capacity
+
+
+class ChatQueue:
+    def __init__(self, bucket):
+        self.bucket = bucket
+        # [приоритет, запрос, future, время постановки, попытки]; порядок внутри чата сохраняется
+        self.items = deque()
+        self.busy = False
+        self.scheduled = False
+
+
+class OutboundQueue:
+    logger = logging.getLogger("OutboundQueue")
+
+    MAX_RETRIES = 3
+    LATENCY_WINDOW = 1000
+    STATS_INTERVAL = 60
+    DRAIN_TIMEOUT = 5
+
+    def __init__(self):
+        # Общий лимит Telegram делится между процессами-воркерами
+        self.global_rate = float(os.getenv('OUTBOUND_GLOBAL_RATE', '30')) / int(os.getenv('WORKER_PROCESSES', '1'))
+        self.chat_rate = float(os.getenv('OUTBOUND_CHAT_RATE', '1'))
+        self.chat_burst = int(os.getenv('OUTBOUND_CHAT_BURST', '3'))
+        self.global_bucket = TokenBucket(self.global_rate, self.global_rate)
+        self.chats = {}
+        # Чаты, у которых первое сообщение можно отправлять, по приоритету этого сообщения
+        self.lanes = (deque(), deque())
+        # Куча (момент, chat_id) для чатов, ждущих токен или retry_after
+        self.delayed = []
+        self.wakeup = asyncio.Event()
+        self.dispatcher = None
+        self.pending = [0, 0]
+        self.counters = {'sent': 0, 'retried': 0, 'failed': 0}
+        self.latencies = deque(maxlen=self.LATENCY_WINDOW)
+        self.stats_logged_at = time.monotonic()
+        self.logged_counters = dict(self.counters)
+
+    async def send(self, chat_id, request, priority=INTERACTIVE):
+        # request - функция без аргументов, возвращающая корутину вызова Bot API.
+        # Рассылки передают user_id из БД строкой, ответы - int: у одного чата должна быть одна очередь
+        chat_id = int(chat_id)
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.create_task(self._dispatch())
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            chat = self.chats[chat_id] = ChatQueue(TokenBucket(self.chat_rate, self.chat_burst))
+        future = asyncio.get_running_loop().create_future()
+        chat.items.append([priority, request, future, time.monotonic(), 0])
+        self.pending[priority] += 1
+        self._schedule(chat_id, chat)
+        # В трассировке обновления это время вместе с ожиданием лимитов
+        with timed(outbound_seconds, PRIORITY_NAMES[priority], component='telegram'):
+            return await future
+
+    def _schedule(self, chat_id, chat):
+        if chat.busy or chat.scheduled or not chat.items:
+            return
+        chat.scheduled = True
+        delay = chat.bucket.delay()
+        if delay:
+            heapq.heappush(self.delayed, (time.monotonic() + delay, chat_id))
+        else:
+            self.lanes[chat.items[0][0]].append(chat_id)
+        self.wakeup.set()
+
+    async def _dispatch(self):
+        while True:
+            now = time.monotonic()
+            while self.delayed and self.delayed[0][0] <= now:
+                chat_id = heapq.heappop(self.delayed)[1]
+                self.lanes[self.chats[chat_id].items[0][0]].append(chat_id)
+            if now - self.stats_logged_at >= self.STATS_INTERVAL:
+                self._log_stats()
+            lane = next((lane for lane in self.lanes if lane), None)
+            if lane is None:
+                self.wakeup.clear()
+                timeout = self.delayed[0][0] - now if self.delayed else self.STATS_INTERVAL
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            delay = self.global_bucket.delay()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+            chat_id = lane.popleft()
+            chat = self.chats[chat_id]
+            chat.scheduled = False
+            item = chat.items.popleft()
+            if item[2].done():
+                # Отправитель уже отменил ожидание
+                self.pending[item[0]] -= 1
+                self._schedule(chat_id, chat)
+                continue
+            self.global_bucket.take()
+            chat.bucket.take()
+            chat.busy = True
+            asyncio.create_task(self._deliver(chat_id, chat, item))
+
+    async def _deliver(self, chat_id, chat, item):
+        priority, request, future, enqueued_at, attempts = item
+        try:
+            result = await request()
+        except TelegramRetryAfter as e:
+            if attempts < self.MAX_RETRIES:
+                self.counters['retried'] += 1
+                self.logger.warning(f"Flood control for chat {chat_id}, retrying in {e.retry_after}s.")
+                item[4] += 1
+                chat.items.appendleft(item)
+                chat.busy = False
+                chat.scheduled = True
+                heapq.heappush(self.delayed, (time.monotonic() + e.retry_after, chat_id))
+                self.wakeup.set()
+                return
+            self._finish(chat_id, chat, item, error=e)
+        except Exception as e:
+            self._finish(chat_id, chat, item, error=e)
+        else:
+            self._finish(chat_id, chat, item, result=result)
+
+    def _finish(self, chat_id, chat, item, result=None, error=None):
+        priority, request, future, enqueued_at, attempts = item
+        self.pending[priority] -= 1
+        if error is None:
+            self.counters['sent'] += 1
+            self.latencies.append(time.monotonic() - enqueued_at)
+            if not future.done():
+                future.set_result(result)
+        else:
+            self.counters['failed'] += 1
+            if not future.done():
+                future.set_exception(error)
+        chat.busy = False
+        self._schedule(chat_id, chat)
+
+    def metrics(self):
+        latencies = sorted(self.latencies)
+        return {
+            'pending_interactive': self.pending[INTERACTIVE],
+            'pending_background': self.pending[BACKGROUND],
+            'latency_p50': latencies[len(latencies) // 2] if latencies else 0,
+            'latency_p95': latencies[int(len(latencies) * 0.95)] if latencies else 0,
+            **self.counters
+        }
+
+    def _log_stats(self):
+        self.stats_logged_at = time.monotonic()
+        # Заодно забываем чаты без сообщений с полностью восстановленным лимитом
+        for chat_id in [chat_id for chat_id, chat in self.chats.items()
+                        if not (chat.items or chat.busy or chat.scheduled) and chat.bucket.idle()]:
+            del self.chats[chat_id]
+        if self.counters != self.logged_counters or any(self.pending):
+            self.logged_counters = dict(self.counters)
+            metrics = self.metrics()
+            self.logger.info(", ".join(f"{name}={value:.3f}" if isinstance(value, float) else f"{name}={value}"
+                                       for name, value in metrics.items()))
+
+    async def close(self):
+        # Даём отправить уже поставленные сообщения, затем останавливаем диспетчер
+        deadline = time.monotonic() + self.DRAIN_TIMEOUT
+        while any(self.pending) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+
+
+outbound_queue = OutboundQueue()
+registry.gauge_source('bot_outbound', outbound_queue.metrics)
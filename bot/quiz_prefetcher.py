@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from dictionary.my_dictionary_collaboration import LanguageProcessing
+from monitoring.metrics import cache_requests
+
+
+class QuizPrefetcher:
+    logger = logging.getLogger("QuizPrefetcher")
+
+    MAX_SESSIONS = 1024
+
+    def __init__(self, build_exercise, max_sessions=MAX_SESSIONS):
+        # build_exercise(user_id, word, category, word_info) -> (текст задания, клавиатура, правильный ответ)
+        self.build_exercise = build_exercise
+        self.max_sessions = max_sessions
+        # user_id -> {word_id: задача, которая готовит очередь упражнений для слова}
+        self.sessions = OrderedDict()
+
+    def start(self, user_id, quiz_plan, exercises_count):
+        # Раунд начался: упражнения для всех слов плана готовятся в фоне, пока пользователь читает карточки
+        self.discard(user_id)
+        self.sessions[user_id] = {
+            word_id: asyncio.create_task(self._prepare(user_id, word, category, exercises_count))
+            for word_id, word, category, status in quiz_plan
+        }
+        while len(self.sessions) > self.max_sessions:
+            self._cancel(self.sessions.popitem(last=False)[1])
+
+    async def _prepare(self, user_id, word, category, exercises_count):
+        try:
+            word_info = await LanguageProcessing.fetch(word)
+            return deque([await self.build_exercise(user_id, word, category, word_info)
+                          for _ in range(exercises_count)])
+        except Exception as e:
+            # Упражнение для этого слова соберётся синхронно в момент квиза
+            self.logger.warning(f"Failed to prefetch exercises for '{word}': {e}")
+            return None
+
+    async def pop(self, user_id, word_id):
+        # Готовое упражнение или None, если слово не из плана раунда или подготовка не удалась
+        task = self.sessions.get(user_id, {}).get(word_id)
+        if task is None:
+            cache_requests.inc('quiz_prefetch', 'miss')
+            return None
+        try:
+            exercises = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled():
+                return None
+            raise
+        cache_requests.inc('quiz_prefetch', 'hit' if exercises else 'miss')
+        return exercises.popleft() if exercises else None
+
+    def discard(self, user_id):
+        self._cancel(self.sessions.pop(user_id, {}))
+
+    @staticmethod
+    def _cancel(session):
+        for task in session.values():
+            task.cancel()
@@ -0,0 +1,257 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+from aiogram.types import Update
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WORKER_COUNT = int(os.getenv('WORKER_PROCESSES', '1'))
+MAIN_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+RESTART_DELAY = 1
+REBALANCE_TIMEOUT = 10
+STOP_TIMEOUT = 15
+POLL_TIMEOUT = 30
+STREAM_LIMIT = 1024 * 1024
+
+
+def shard_for(user_id, workers):
+    # Rendezvous hashing: когда воркер выпадает или возвращается, переезжают только его пользователи
+    return max(workers, key=lambda index: hashlib.blake2b(f"{index}:{user_id}".encode(), digest_size=8).digest())
+
+
+def update_user_id(update):
+    for event in update.values():
+        if isinstance(event, dict):
+            user = event.get('from') or event.get('user')
+            if user:
+                return user.get('id')
+    return None
+
+
+class ShardProcess:
+    logger = logging.getLogger("ShardProcess")
+
+    def __init__(self, index, supervisor):
+        self.index = index
+        self.supervisor = supervisor
+        self.process = None
+        self.closing = False
+        self.ready = False
+        self._reader_task = None
+
+    async def start(self):
+        self.ready = False
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, MAIN_FILE,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env={**os.environ, 'BOT_SHARD_INDEX': str(self.index)},
+            limit=STREAM_LIMIT
+        )
+        self._reader_task = asyncio.create_task(self._read_acks())
+        self.logger.info(f"Bot worker #{self.index} started (pid {self.process.pid}).")
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def routable(self):
+        # Обновления получает только воркер, который уже поднял БД и читает stdin
+        return self.alive and self.ready
+
+    async def send(self, message):
+        self.process.stdin.write((json.dumps(message) + '\n').encode('utf-8'))
+        await self.process.stdin.drain()
+
+    async def _read_acks(self):
+        async for line in self.process.stdout:
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                self.logger.error(f"Bot worker #{self.index} sent malformed output: {line[:200]!r}")
+                continue
+            if message.get('type') == 'ready':
+                self.ready = True
+                asyncio.create_task(self.supervisor.rebalance())
+            elif message.get('type') == 'rebalanced':
+                self.supervisor.ack(self.index, message.get('epoch'))
+        await self._handle_exit()
+
+    async def _handle_exit(self):
+        return_code = await self.process.wait()
+        if self.closing:
+            return
+        self.logger.error(f"Bot worker #{self.index} exited with code {return_code}, restarting.")
+        # Пока воркер перезапускается, его пользователей обслуживают остальные
+        await self.supervisor.rebalance()
+        await asyncio.sleep(RESTART_DELAY)
+        if not self.closing:
+            await self.start()
+
+    async def close(self):
+        self.closing = True
+        if self.alive:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self._reader_task and self._reader_task is not asyncio.current_task():
+            self._reader_task.cancel()
+
+
+class ShardSupervisor:
+    logger = logging.getLogger("ShardSupervisor")
+
+    def __init__(self, size=WORKER_COUNT):
+        self.processes = [ShardProcess(index, self) for index in range(size)]
+        self.epoch = 0
+        # Таблица раздачи: воркеры, подтвердившие последнюю перебалансировку
+        self.workers = []
+        self.rebalancing_workers = []
+        self.acked = set()
+        self.rebalanced = asyncio.Event()
+        self.routing_ready = asyncio.Event()
+        self.rebalance_lock = asyncio.Lock()
+
+    def live_workers(self):
+        return [process.index for process in self.processes if process.routable]
+
+    async def start(self):
+        # Воркер попадает в раздачу после сообщения ready, которое запускает перебалансировку
+        self.routing_ready.set()
+        await asyncio.gather(*(process.start() for process in self.processes))
+
+    async def rebalance(self):
+        # Обновления не раздаются, пока все воркеры не сбросят FSM в БД и не забудут чужих пользователей
+        async with self.rebalance_lock:
+            self.routing_ready.clear()
+            self.epoch += 1
+            self.acked = set()
+            self.rebalanced.clear()
+            workers = self.rebalancing_workers = self.live_workers()
+            for index in workers:
+                try:
+                    await self.processes[index].send({'type': 'rebalance', 'epoch': self.epoch, 'workers': workers})
+                except (ConnectionError, AttributeError):
+                    self.acked.add(index)
+            if not self.acked.issuperset(workers):
+                try:
+                    await asyncio.wait_for(self.rebalanced.wait(), REBALANCE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    self.logger.warning(f"Rebalance {self.epoch}: no ack from workers "
+                                        f"{sorted(set(workers) - self.acked)}.")
+            self.workers = workers
+            self.logger.info(f"Rebalance {self.epoch}: updates are routed to workers {workers}.")
+            self.routing_ready.set()
+
+    def ack(self, index, epoch):
+        if epoch == self.epoch:
+            self.acked.add(index)
+            if self.acked.issuperset(self.rebalancing_workers):
+                self.rebalanced.set()
+
+    async def feed_update(self, bot, update: Update):
+        # Интерфейс как у Dispatcher, чтобы WebhookServer мог отдавать обновления супервизору
+        data = update.model_dump(mode='json', by_alias=True, exclude_none=True)
+        user_id = update_user_id(data)
+        while True:
+            await self.routing_ready.wait()
+            workers = self.workers
+            if not workers:
+                await asyncio.sleep(RESTART_DELAY)
+                continue
+            index = shard_for(user_id, workers) if user_id is not None else min(workers)
+            if not self.processes[index].alive:
+                # Воркер упал, таблица раздачи обновится после перебалансировки
+                await asyncio.sleep(RESTART_DELAY)
+                continue
+            try:
+                await self.processes[index].send({'type': 'update', 'update': data})
+                return
+            except (ConnectionError, AttributeError):
+                # Воркер упал между выбором и отправкой: обновление уйдёт новому владельцу
+                await asyncio.sleep(RESTART_DELAY)
+
+    @staticmethod
+    def resolve_used_update_types():
+        return None
+
+    async def poll(self, bot):
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=POLL_TIMEOUT)
+            except Exception as e:
+                self.logger.error(f"Failed to fetch updates: {e}")
+                await asyncio.sleep(RESTART_DELAY)
+                continue
+            for update in updates:
+                await self.feed_update(bot, update)
+                offset = update.update_id + 1
+
+    async def close(self):
+        await asyncio.gather(*(process.close() for process in self.processes))
+
+
+class ShardWorker:
+    logger = logging.getLogger("ShardWorker")
+
+    def __init__(self, index, dp, bot, storage, bot_routers):
+        self.index = index
+        self.dp = dp
+        self.bot = bot
+        self.storage = storage
+        self.bot_routers = bot_routers
+        self.in_flight = set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=STREAM_LIMIT)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        self._write({'type': 'ready'})
+        self.logger.info(f"Bot worker #{self.index} is ready.")
+        # Конец stdin значит, что супервизор остановился
+        async for line in reader:
+            message = json.loads(line)
+            if message['type'] == 'update':
+                update = Update.model_validate(message['update'], context={'bot': self.bot})
+                task = asyncio.create_task(self._process(update))
+                self.in_flight.add(task)
+                task.add_done_callback(self.in_flight.discard)
+            elif message['type'] == 'rebalance':
+                await self._rebalance(message['epoch'], message['workers'])
+        await asyncio.gather(*self.in_flight, return_exceptions=True)
+
+    async def _process(self, update):
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            self.logger.error(f"Failed to process update {update.update_id}: {e}")
+
+    async def _rebalance(self, epoch, workers):
+        await asyncio.gather(*self.in_flight, return_exceptions=True)
+        # Состояние переехавших пользователей новый владелец прочитает из БД
+        await self.storage.reset()
+        self.bot_routers.distractors.pools.clear()
+        self.bot_routers.db.settings_cache.clear()
+        tracker = self.bot_routers.inactivity_tracker
+        for user_id in list(tracker.users):
+            if shard_for(user_id, workers) != self.index:
+                tracker.forget(user_id)
+        prefetcher = self.bot_routers.quiz_prefetcher
+        for user_id in list(prefetcher.sessions):
+            if shard_for(user_id, workers) != self.index:
+                prefetcher.discard(user_id)
+        self._write({'type': 'rebalanced', 'epoch': epoch})
+
+    @staticmethod
+    def _write(message):
+        sys.stdout.write(json.dumps(message) + '\n')
+        sys.stdout.flush()
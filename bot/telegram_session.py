@@ -0,0 +1,46 @@
+import os
+import time
+from aiohttp import ClientSession
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
+from aiogram import __version__ as aiogram_version
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from monitoring.metrics import record, telegram_seconds
+
+
+class TelegramSession(AiohttpSession):
+    # TCP_NODELAY asyncio выставляет на всех TCP-сокетах сам, здесь настраиваются только лимит и keep-alive
+    def __init__(self):
+        # TELEGRAM_API_URL - локальный Bot API сервер или заглушка для бенчмарков
+        api_url = os.getenv('TELEGRAM_API_URL')
+        self.connection_limit = int(os.getenv('TELEGRAM_CONNECTION_LIMIT', '100'))
+        self.keepalive_timeout = float(os.getenv('TELEGRAM_KEEPALIVE_TIMEOUT', '60'))
+        super().__init__(api=TelegramAPIServer.from_base(api_url) if api_url else PRODUCTION,
+                         limit=self.connection_limit)
+        self.middleware(self._timed_request)
+
+    async def create_session(self):
+        # То же, что AiohttpSession.create_session (сброс при смене прокси, User-Agent aiogram), но
+        # соединитель получает keep-alive поверх настроек базового класса, которые здесь не меняются
+        if self._should_reset_connector:
+            await self.close()
+        if self._session is None or self._session.closed:
+            connector = self._connector_type(**self._connector_init, keepalive_timeout=self.keepalive_timeout)
+            self._session = ClientSession(
+                connector=connector,
+                headers={USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{aiogram_version}"},
+            )
+            self._should_reset_connector = False
+        return self._session
+
+    @staticmethod
+    async def _timed_request(make_request, bot, method):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = await make_request(bot, method)
+            outcome = 'ok'
+            return response
+        finally:
+            record(telegram_seconds, started, method.__api_method__, outcome)
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import os
+import signal
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class WebhookServer:
+    logger = logging.getLogger("WebhookServer")
+
+    def __init__(self, dp: Dispatcher, bot: Bot):
+        self.dp = dp
+        self.bot = bot
+        self.host = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+        self.port = int(os.getenv('WEBHOOK_PORT', '8080'))
+        self.path = os.getenv('WEBHOOK_PATH', '/webhook')
+        self.secret = os.getenv('WEBHOOK_SECRET')
+        # Публичный адрес для setWebhook; без него сервер просто принимает POST (удобно для локальных тестов)
+        self.url = os.getenv('WEBHOOK_URL')
+        self.workers = int(os.getenv('WEBHOOK_WORKERS', '16'))
+        self.drain_timeout = float(os.getenv('WEBHOOK_DRAIN_TIMEOUT', '10'))
+        # Ограниченная очередь: при перегрузке ответ Telegram задерживается, и он сам притормаживает доставку
+        self.queue = asyncio.Queue(maxsize=int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000')))
+
+    async def handle_update(self, request: web.Request):
+        if self.secret and request.headers.get(SECRET_HEADER) != self.secret:
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={'bot': self.bot})
+        except ValueError as e:
+            self.logger.warning(f"Rejected malformed update: {e}")
+            return web.Response(status=400)
+        await self.queue.put(update)
+        return web.Response()
+
+    async def _worker(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception as e:
+                self.logger.error(f"Failed to process update {update.update_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def run(self):
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, self.port)
+        await site.start()
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        if self.url:
+            await self.bot.set_webhook(self.url.rstrip('/') + self.path, secret_token=self.secret,
+                                       allowed_updates=self.dp.resolve_used_update_types())
+        self.logger.info(f"Listening for updates on {self.host}:{self.port}{self.path}")
+        try:
+            await stop.wait()
+        finally:
+            # Новые запросы больше не принимаются, уже полученные обновления дообрабатываются
+            await site.stop()
+            try:
+                await asyncio.wait_for(self.queue.join(), self.drain_timeout)
+            except asyncio.TimeoutError:
+                self.logger.warning(f"{self.queue.qsize()} updates left unprocessed after drain timeout.")
+            for worker in workers:
+                worker.cancel()
+            await runner.cleanup()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
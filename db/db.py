@@ -1,15 +1,44 @@
+import asyncio
+import json
 import logging
 import os
 import random
 import uuid
-from datetime import datetime, timedelta
-import psycopg2
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple
+import asyncpg
 from dotenv import load_dotenv
+from db.migrations import MigrationRunner
+from monitoring.metrics import cache_requests, db_method_seconds, db_query_seconds, timed, timed_methods
 
 
+SETTINGS_COLUMNS = "daily_reminder, word_of_the_day, quiz_words_count, quiz_exercises_count"
+
+
+class UserSettings(NamedTuple):
+    daily_reminder: bool
+    word_of_the_day: bool
+    quiz_words_count: int
+    quiz_exercises_count: int
+
+
+@timed_methods(db_method_seconds, exclude=('connect', 'close', 'execute', 'fetch', 'fetchrow', 'fetchval'))
 class DB:
     logger = logging.getLogger("BotDB")
 
+    CONNECT_ATTEMPTS = 5
+    QUERY_RETRIES = 2
+    RETRY_DELAY = 0.5
+    # Ошибки потерянного соединения: запрос повторяется на другом соединении из пула
+    reconnect_errors = (
+        asyncpg.exceptions.ConnectionDoesNotExistError,
+        asyncpg.exceptions.CannotConnectNowError,
+        asyncpg.exceptions.PostgresConnectionError,
+        ConnectionError,
+        OSError
+    )
+
     def __init__(self):
         load_dotenv()
 
@@ -17,216 +46,360 @@ class DB:
         self.db_user = os.getenv('POSTGRES_USER')
         self.db_password = os.getenv('POSTGRES_PASSWORD')
         self.db_host = os.getenv('DB_HOST')
+        self.pool_min_size = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+        self.pool_max_size = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+        self.query_timeout = float(os.getenv('DB_QUERY_TIMEOUT', '5'))
+        self.pool = None
+        # Настройки меняются только через update_settings, поэтому кэш обновляется при записи
+        self.settings_cache = OrderedDict()
+        self.settings_cache_size = int(os.getenv('SETTINGS_CACHE_ENTRIES', '10000'))
 
-        self.conn = psycopg2.connect(
-            dbname=self.db_name,
-            user=self.db_user,
-            password=self.db_password,
-            host=self.db_host
-        )
-        self.cursor = self.conn.cursor()
+    async def connect(self):
+        for attempt in range(1, self.CONNECT_ATTEMPTS + 1):
+            try:
+                self.pool = await asyncpg.create_pool(
+                    database=self.db_name,
+                    user=self.db_user,
+                    password=self.db_password,
+                    host=self.db_host,
+                    min_size=self.pool_min_size,
+                    max_size=self.pool_max_size,
+                    command_timeout=self.query_timeout,
+                    init=self._init_connection
+                )
+                break
+            except self.reconnect_errors as e:
+                if attempt == self.CONNECT_ATTEMPTS:
+                    raise
+                self.logger.warning(f"PostgreSQL is not available ({e!r}), retrying.")
+                await asyncio.sleep(self.RETRY_DELAY * 2 ** attempt)
 
         self.logger.info("Connected to PostgreSQL database.")
-        self.create_database()
-
-    def create_database(self):
-        sql_script = """
-        CREATE TABLE IF NOT EXISTS words (
-            id UUID PRIMARY KEY,
-            word TEXT NOT NULL,
-            category TEXT NOT NULL,
-            status TEXT NOT NULL,
-            modified_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            user_id TEXT NOT NULL
-        );
-        CREATE TABLE IF NOT EXISTS settings (
-            user_id TEXT PRIMARY KEY,
-            daily_reminder TEXT NOT NULL DEFAULT 'enabled',
-            word_of_the_day TEXT NOT NULL DEFAULT 'enabled',
-            quiz_words_count TEXT NOT NULL DEFAULT '5',
-            quiz_exercises_count TEXT NOT NULL DEFAULT '5'
-        );
-        """
-        self.cursor.execute(sql_script)
-        self.conn.commit()
-        self.logger.info("Database structure created successfully.")
-
-    def insert_new_word(self, word, category, user_id):
-        word_uuid = str(uuid.uuid4())
+        await MigrationRunner(self.pool).run()
+
+    @staticmethod
+    async def _init_connection(conn):
+        await conn.set_type_codec('jsonb', encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def _run(self, method, query, *args, idempotent=None):
+        # Время запроса вместе с ожиданием соединения из пула; метка - первое слово SQL.
+        # После обрыва соединения повторяются чтения и записи с idempotent=True: изменение могло
+        # успеть закоммититься, и повтор неидемпотентной записи применил бы его дважды.
+        # Ошибка до отправки запроса (при получении соединения) повторяется всегда
+        operation = query.lstrip().split(None, 1)[0].upper()
+        if idempotent is None:
+            idempotent = operation == 'SELECT'
+        for attempt in range(self.QUERY_RETRIES + 1):
+            sent = False
+            try:
+                with timed(db_query_seconds, operation, component='db'):
+                    async with self.pool.acquire() as conn:
+                        sent = True
+                        return await getattr(conn, method)(query, *args, timeout=self.query_timeout)
+            except asyncio.TimeoutError:
+                # TimeoutError наследуется от OSError, но медленный запрос повторять не нужно
+                raise
+            except self.reconnect_errors as e:
+                if attempt == self.QUERY_RETRIES or (sent and not idempotent):
+                    raise
+                self.logger.warning(f"Lost connection to PostgreSQL ({e!r}), retrying query.")
+                await asyncio.sleep(self.RETRY_DELAY * 2 ** attempt)
+
+    async def execute(self, query, *args, idempotent=None):
+        return await self._run('execute', query, *args, idempotent=idempotent)
+
+    async def fetch(self, query, *args, idempotent=None):
+        return await self._run('fetch', query, *args, idempotent=idempotent)
+
+    async def fetchrow(self, query, *args, idempotent=None):
+        return await self._run('fetchrow', query, *args, idempotent=idempotent)
+
+    async def fetchval(self, query, *args, idempotent=None):
+        return await self._run('fetchval', query, *args, idempotent=idempotent)
+
+    @staticmethod
+    def _affected_rows(status):
+        # asyncpg возвращает статус команды вида 'DELETE 3'
+        return int(status.split()[-1])
+
+    async def insert_new_word(self, word, category, user_id):
+        word_uuid = uuid.uuid4()
         current_datetime = datetime.now()
-        self.cursor.execute(
-            'INSERT INTO words (id, word, category, status, modified_date, user_id) VALUES (%s, %s, %s, %s, %s, %s);',
-            (word_uuid, word, category, "New", current_datetime, user_id)
+        await self.execute(
+            'INSERT INTO words (id, word, category, status, modified_date, user_id) VALUES ($1, $2, $3, $4, $5, $6) '
+            'ON CONFLICT (user_id, word, category) DO NOTHING;',
+            word_uuid, word, category, "New", current_datetime, user_id,
+            idempotent=True
         )
-        self.conn.commit()
 
-    def insert_user_settings(self, user_id):
-        self.cursor.execute(
-            "SELECT user_id FROM settings WHERE user_id = %s;", (user_id,)
+    async def insert_user_settings(self, user_id):
+        await self.execute(
+            'INSERT INTO settings (user_id, daily_reminder, word_of_the_day) VALUES ($1, $2, $3) '
+            'ON CONFLICT (user_id) DO NOTHING;',
+            user_id, "enabled", "enabled",
+            idempotent=True
         )
-        user_info = self.cursor.fetchone()
-        if not user_info:
-            self.cursor.execute(
-                'INSERT INTO settings (user_id, daily_reminder, word_of_the_day) VALUES (%s, %s, %s);',
-                (user_id, "enabled", "enabled")
-            )
-            self.conn.commit()
-
-    def select_words_by_status(self, status, user_id):
-        data = None
-        chosen_status = None
-        count = 10
-
-        if status == 'New/Acquainted':
-            statuses = ['New', 'Acquainted']
-            while not data and count > 0:
-                chosen_status = random.choice(statuses)
-                self.cursor.execute(
-                    f"SELECT id, word, category FROM words WHERE status = %s AND user_id = %s ORDER BY RANDOM() LIMIT 1;",
-                    (chosen_status, user_id)
-                )
-                data = self.cursor.fetchall()
-                count -= 1
-            if chosen_status == 'New':
-                self.update_word_status(data[0][0], 'Acquainted')
-            else:
-                self.update_word_status(data[0][0], 'Familiar')
-
-        elif status == 'New':
-            self.cursor.execute(
-                f"SELECT id, word, category FROM words WHERE status = %s AND user_id = %s ORDER BY RANDOM() LIMIT 1;",
-                ('New', user_id)
+
+    async def plan_quiz_session(self, user_id, statuses, words_count):
+        # Все слова раунда выбираются одним запросом: для каждого статуса берётся до words_count слов
+        # подряд по rand_key от случайной точки, затем слова чередуются по статусам (как и раньше,
+        # статусы равновероятны). Выбранные слова сразу помечаются 'Shown', прежний статус
+        # сохраняется в prior_status - всё в одной транзакции.
+        rows = await self.fetch(
+            """
+            WITH candidates AS (
+                SELECT found.id, found.status,
+                       row_number() OVER (PARTITION BY found.status ORDER BY found.wrapped, found.rand_key) AS position
+                FROM unnest($2::text[]) AS chosen(status)
+                CROSS JOIN LATERAL (
+                    (SELECT id, status, rand_key, FALSE AS wrapped FROM words
+                     WHERE user_id = $1 AND status = chosen.status AND rand_key >= $4
+                     ORDER BY rand_key LIMIT $3)
+                    UNION ALL
+                    (SELECT id, status, rand_key, TRUE AS wrapped FROM words
+                     WHERE user_id = $1 AND status = chosen.status AND rand_key < $4
+                     ORDER BY rand_key LIMIT $3)
+                ) AS found
+            ),
+            picked AS (
+                SELECT id, status FROM candidates ORDER BY position, random() LIMIT $3
             )
-            data = self.cursor.fetchall()
-            self.update_word_status(data[0][0], 'Acquainted')
-
-        elif status == 'Familiar/Reviewed':
-            statuses = ['Familiar', 'Reviewed']
-            while not data and count > 0:
-                chosen_status = random.choice(statuses)
-                self.cursor.execute(
-                    f"SELECT id, word, category FROM words WHERE status = %s AND user_id = %s ORDER BY RANDOM() LIMIT 1;",
-                    (chosen_status, user_id)
-                )
-                data = self.cursor.fetchall()
-                count -= 1
-            if chosen_status == 'Familiar':
-                self.update_word_status(data[0][0], 'Reviewed')
-            else:
-                self.update_word_status(data[0][0], 'Memorized')
-
-        return data[0][0], data[0][1], data[0][2], chosen_status
-
-    def update_word_status(self, word_id, status):
-        self.cursor.execute(
-            "UPDATE words SET status = %s WHERE id = %s;", (status, word_id)
+            UPDATE words SET status = 'Shown', prior_status = picked.status, rand_key = random()
+            FROM picked WHERE words.id = picked.id
+            RETURNING words.id, words.word, words.category, picked.status;
+            """,
+            user_id, statuses, words_count, random.random()
+        )
+        session_words = [[str(row[0]), row[1], row[2], row[3]] for row in rows]
+        random.shuffle(session_words)
+        return session_words
+
+    async def update_word_statuses(self, transitions):
+        # Пакетная смена статусов одним UPDATE вместо отдельного запроса и коммита на каждое слово
+        if not transitions:
+            return []
+        word_ids = [uuid.UUID(str(word_id)) for word_id, status in transitions]
+        statuses = [status for word_id, status in transitions]
+        rows = await self.fetch(
+            """
+            UPDATE words SET status = batch.status, prior_status = NULL
+            FROM unnest($1::uuid[], $2::text[]) AS batch(id, status)
+            WHERE words.id = batch.id
+            RETURNING words.id, words.status;
+            """,
+            word_ids, statuses,
+            idempotent=True
         )
-        self.conn.commit()
+        return [(str(row[0]), row[1]) for row in rows]
 
-    def update_settings(self, user_id, setting, choice):
-        self.cursor.execute(
-            f"UPDATE settings SET {setting} = %s WHERE user_id = %s;", (choice, user_id)
+    async def update_settings(self, user_id, setting, choice):
+        row = await self.fetchrow(
+            f"UPDATE settings SET {setting} = $1 WHERE user_id = $2 RETURNING {SETTINGS_COLUMNS};", choice, user_id,
+            idempotent=True
         )
-        self.conn.commit()
+        if row:
+            self._cache_settings(user_id, self._settings_from_row(row))
 
-    def select_all_by_word(self, word, category, user_id):
-        self.cursor.execute(
-            f"SELECT * FROM words WHERE word = %s AND category = %s AND user_id = %s LIMIT 1;",
-            (word, category, user_id)
+    async def select_all_by_word(self, word, category, user_id):
+        word_data = await self.fetchrow(
+            "SELECT id, word, category, status FROM words WHERE word = $1 AND category = $2 AND user_id = $3 LIMIT 1;",
+            word, category, user_id
         )
-        word_data = self.cursor.fetchall()
         if word_data:
-            return word_data[0][0], word_data[0][1], word_data[0][2], word_data[0][3]
+            return str(word_data[0]), word_data[1], word_data[2], word_data[3]
         else:
             return None
 
-    def select_all_by_word_id(self, id):
-        self.cursor.execute(
-            f"SELECT * FROM words WHERE id = %s;", (id,)
+    async def select_all_by_word_id(self, id):
+        word_data = await self.fetchrow(
+            "SELECT id, word, category, status, modified_date, user_id FROM words WHERE id = $1;", uuid.UUID(str(id))
         )
-        word_data = self.cursor.fetchone()
         if word_data:
-            return word_data
+            return (str(word_data[0]),) + tuple(word_data[1:])
         else:
             return None
 
-    def select_random_row(self, category, user_id):
-        if category == 'All':
-            self.cursor.execute(
-                f"SELECT word FROM words WHERE user_id = %s ORDER BY RANDOM() LIMIT 1;", (user_id,)
-            )
-        else:
-            self.cursor.execute(
-                f"SELECT word FROM words WHERE category = %s AND user_id = %s ORDER BY RANDOM() LIMIT 1;",
-                (category, user_id)
-            )
-        word_data = self.cursor.fetchone()
-        return word_data[0] if word_data else None
-
-    def select_count_by_category(self, category, user_id):
-        self.cursor.execute(
-            f"SELECT COUNT(id) FROM words WHERE category = %s AND user_id = %s;",
-            (category, user_id)
+    async def select_user_words(self, user_id):
+        return await self.fetch(
+            "SELECT word, category FROM words WHERE user_id = $1;", user_id
         )
-        count = self.cursor.fetchone()
-        return count[0] if count else 0
 
-    def select_date_delta(self, user_id):
-        self.cursor.execute(
-            f"SELECT modified_date FROM words WHERE user_id = %s ORDER BY modified_date DESC LIMIT 1;", (user_id,)
+    async def select_reminder_recipients(self, user_ids):
+        # Пользователи из списка с включённым напоминанием, которые сегодня ещё не занимались
+        rows = await self.fetch(
+            """
+            SELECT settings.user_id FROM settings
+            WHERE settings.user_id = ANY($1::text[]) AND settings.daily_reminder = 'enabled'
+              AND (SELECT MAX(modified_date) FROM words WHERE words.user_id = settings.user_id) < $2;
+            """,
+            list(user_ids), datetime.combine(datetime.now().date(), datetime.min.time())
         )
-        latest_date_row = self.cursor.fetchone()
-        if latest_date_row:
-            latest_date = latest_date_row[0]
-            current_date = datetime.now()
-            date_difference = current_date.date() - latest_date.date()
-            return date_difference >= timedelta(days=1)
-        else:
-            return False
+        return [tuple(row) for row in rows]
 
-    def select_word_of_the_day(self, user_id):
-        self.cursor.execute(
-            f"SELECT word, category FROM words WHERE user_id = %s AND status <> 'New' ORDER BY RANDOM() LIMIT 1;",
-            (user_id,)
+    async def select_words_of_the_day(self, user_ids):
+        # Слово дня для всех пользователей из списка одним запросом: случайная строка без ORDER BY RANDOM() -
+        # первое слово с rand_key >= r (или первое с начала, если таких нет), отдельно для каждого
+        # пользователя через LATERAL. Вероятность слова пропорциональна промежутку перед его ключом.
+        # Задача срабатывает раз в сутки, и перед выбором ключи этих пользователей выдаются заново:
+        # при свежих независимых ключах каждое слово выбирается с равной вероятностью
+        await self.execute(
+            """
+            UPDATE words SET rand_key = random()
+            FROM settings
+            WHERE words.user_id = settings.user_id AND words.status <> 'New'
+              AND settings.user_id = ANY($1::text[]) AND settings.word_of_the_day = 'enabled';
+            """,
+            list(user_ids),
+            idempotent=True
         )
-        word_of_the_day = self.cursor.fetchone()
-        if word_of_the_day:
-            return word_of_the_day[0], word_of_the_day[1]
-        else:
-            return False
-
-    def select_setting(self, user_id, setting):
-        self.cursor.execute(
-            f"SELECT {setting} FROM settings WHERE user_id = %s;", (user_id,)
+        rows = await self.fetch(
+            """
+            SELECT settings.user_id, word.word, word.category FROM settings
+            CROSS JOIN LATERAL (
+                (SELECT word, category FROM words
+                 WHERE user_id = settings.user_id AND status <> 'New' AND rand_key >= $2
+                 ORDER BY rand_key LIMIT 1)
+                UNION ALL
+                (SELECT word, category FROM words
+                 WHERE user_id = settings.user_id AND status <> 'New' AND rand_key < $2
+                 ORDER BY rand_key LIMIT 1)
+                LIMIT 1
+            ) AS word
+            WHERE settings.user_id = ANY($1::text[]) AND settings.word_of_the_day = 'enabled';
+            """,
+            list(user_ids), random.random()
         )
-        setting_value = self.cursor.fetchone()
-        if setting != 'quiz_words_count' and setting != 'quiz_exercises_count':
-            return setting_value[0] == 'enabled' if setting_value else False
-        else:
-            return setting_value[0]
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def _settings_from_row(row):
+        return UserSettings(row[0] == 'enabled', row[1] == 'enabled', row[2], row[3])
+
+    def _cache_settings(self, user_id, settings):
+        self.settings_cache[user_id] = settings
+        self.settings_cache.move_to_end(user_id)
+        while len(self.settings_cache) > self.settings_cache_size:
+            self.settings_cache.popitem(last=False)
+
+    async def select_settings(self, user_id):
+        settings = self.settings_cache.get(user_id)
+        cache_requests.inc('settings', 'miss' if settings is None else 'hit')
+        if settings is None:
+            row = await self.fetchrow(f"SELECT {SETTINGS_COLUMNS} FROM settings WHERE user_id = $1;", user_id)
+            if row is None:
+                return None
+            settings = self._settings_from_row(row)
+        self._cache_settings(user_id, settings)
+        return settings
 
-    def select_stats(self, user_id):
-        self.cursor.execute(
-            f"SELECT COUNT(*) FROM words WHERE user_id = %s AND status = 'New';", (user_id,)
+    async def select_setting(self, user_id, setting):
+        settings = await self.select_settings(user_id)
+        if settings is None:
+            return None if setting in ('quiz_words_count', 'quiz_exercises_count') else False
+        return getattr(settings, setting)
+
+    async def select_stats(self, user_id):
+        # Счётчики поддерживает триггер на words в той же транзакции, что и изменение слова
+        rows = await self.fetch(
+            "SELECT status, n FROM user_word_counts WHERE user_id = $1;", user_id
         )
-        new_words_count = self.cursor.fetchone()
-        self.cursor.execute(
-            f"SELECT COUNT(*) FROM words WHERE user_id = %s AND status = 'Acquainted' OR status = 'Familiar' OR status = 'Reviewed';",
-            (user_id,)
+        counts = {status: n for status, n in rows}
+        new_words_count = counts.get('New', 0)
+        words_to_learn_count = counts.get('Acquainted', 0) + counts.get('Familiar', 0) + counts.get('Reviewed', 0)
+        memorized_words_count = counts.get('Memorized', 0)
+        return new_words_count, words_to_learn_count, memorized_words_count
+
+    async def reconcile_word_counts(self):
+        # Пересчёт счётчиков по words через GROUP BY; возвращает найденные расхождения
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("LOCK TABLE words IN SHARE MODE;")
+                drift = await conn.fetch(
+                    """
+                    WITH actual AS (
+                        SELECT user_id, status, COUNT(*)::integer AS n FROM words GROUP BY user_id, status
+                    )
+                    SELECT COALESCE(actual.user_id, counted.user_id) AS user_id,
+                           COALESCE(actual.status, counted.status) AS status,
+                           COALESCE(counted.n, 0) AS counted, COALESCE(actual.n, 0) AS actual
+                    FROM actual FULL JOIN user_word_counts AS counted
+                        ON counted.user_id = actual.user_id AND counted.status = actual.status
+                    WHERE COALESCE(counted.n, 0) <> COALESCE(actual.n, 0);
+                    """
+                )
+                await conn.execute("DELETE FROM user_word_counts;")
+                await conn.execute(
+                    "INSERT INTO user_word_counts (user_id, status, n) "
+                    "SELECT user_id, status, COUNT(*) FROM words GROUP BY user_id, status;"
+                )
+        for row in drift:
+            self.logger.warning(f"Word count drift for user {row['user_id']}, status {row['status']}: "
+                                f"{row['counted']} counted, {row['actual']} actual.")
+        return drift
+
+    async def select_shown_words(self, user_id):
+        # Слова, оставшиеся 'Shown' после прерванного раунда, возвращаются в статус до раунда
+        rows = await self.fetch(
+            "UPDATE words SET status = COALESCE(prior_status, 'New'), prior_status = NULL "
+            "WHERE status = 'Shown' AND user_id = $1 RETURNING id;",
+            user_id,
+            idempotent=True
         )
-        words_to_learn_count = self.cursor.fetchone()
-        self.cursor.execute(
-            f"SELECT COUNT(*) FROM words WHERE user_id = %s AND status = 'Memorized';",
-            (user_id,)
+        return len(rows)
+
+    async def select_lexical_cache(self, word, language_pair, source):
+        return await self.fetchrow(
+            "UPDATE lexical_cache SET accessed_at = CURRENT_TIMESTAMP "
+            "WHERE word = $1 AND language_pair = $2 AND source = $3 AND expires_at > CURRENT_TIMESTAMP "
+            "RETURNING payload, expires_at;",
+            word, language_pair, source,
+            idempotent=True
         )
-        memorized_words_count = self.cursor.fetchone()
-        return new_words_count[0], words_to_learn_count[0], memorized_words_count[0]
 
-    def select_shown_words(self):
-        self.cursor.execute(
-            f"SELECT id FROM words WHERE status = 'Shown';"
+    async def upsert_lexical_cache(self, word, language_pair, source, payload, expires_at):
+        await self.execute(
+            "INSERT INTO lexical_cache (word, language_pair, source, payload, expires_at) VALUES ($1, $2, $3, $4, $5) "
+            "ON CONFLICT (word, language_pair, source) DO UPDATE "
+            "SET payload = EXCLUDED.payload, expires_at = EXCLUDED.expires_at, accessed_at = CURRENT_TIMESTAMP;",
+            word, language_pair, source, payload, expires_at,
+            idempotent=True
         )
-        data = self.cursor.fetchall()
-        if data:
-            for word_id in data:
-                self.update_word_status(word_id, 'New')
+
+    async def prune_lexical_cache(self, max_rows):
+        removed = self._affected_rows(await self.execute(
+            "DELETE FROM lexical_cache WHERE expires_at <= CURRENT_TIMESTAMP;",
+            idempotent=True
+        ))
+        removed += self._affected_rows(await self.execute(
+            "DELETE FROM lexical_cache WHERE (word, language_pair, source) IN ("
+            "SELECT word, language_pair, source FROM lexical_cache ORDER BY accessed_at DESC OFFSET $1);",
+            max_rows,
+            idempotent=True
+        ))
+        return removed
+
+    async def select_fsm_record(self, key):
+        return await self.fetchrow("SELECT state, data FROM fsm_storage WHERE key = $1;", key)
+
+    async def save_fsm_records(self, records):
+        # records: [(key, state, data)]; пустые записи удаляются, остальные пишутся одним запросом
+        empty_keys = [key for key, state, data in records if state is None and not data]
+        filled = [(key, state, json.dumps(data)) for key, state, data in records if state is not None or data]
+        if empty_keys:
+            await self.execute("DELETE FROM fsm_storage WHERE key = ANY($1::text[]);", empty_keys, idempotent=True)
+        if filled:
+            await self.execute(
+                """
+                INSERT INTO fsm_storage (key, state, data)
+                SELECT key, state, data::jsonb FROM unnest($1::text[], $2::text[], $3::text[]) AS batch(key, state, data)
+                ON CONFLICT (key) DO UPDATE
+                SET state = EXCLUDED.state, data = EXCLUDED.data, updated_at = CURRENT_TIMESTAMP;
+                """,
+                *map(list, zip(*filled)),
+                idempotent=True
+            )
@@ -0,0 +1,147 @@
+import logging
+
+# Версионированные изменения схемы. Новые миграции только добавляются в конец списка,
+# уже применённые никогда не редактируются.
+MIGRATIONS = [
+    (1, 'create_words_and_settings', """
+        CREATE TABLE IF NOT EXISTS words (
+            id UUID PRIMARY KEY,
+            word TEXT NOT NULL,
+            category TEXT NOT NULL,
+            status TEXT NOT NULL,
+            modified_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            user_id TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS settings (
+            user_id TEXT PRIMARY KEY,
+            daily_reminder TEXT NOT NULL DEFAULT 'enabled',
+            word_of_the_day TEXT NOT NULL DEFAULT 'enabled',
+            quiz_words_count TEXT NOT NULL DEFAULT '5',
+            quiz_exercises_count TEXT NOT NULL DEFAULT '5'
+        );
+    """),
+    (2, 'create_lexical_cache', """
+        CREATE TABLE IF NOT EXISTS lexical_cache (
+            word TEXT NOT NULL,
+            language_pair TEXT NOT NULL,
+            source TEXT NOT NULL,
+            payload JSONB,
+            expires_at TIMESTAMP NOT NULL,
+            accessed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (word, language_pair, source)
+        );
+        CREATE INDEX IF NOT EXISTS lexical_cache_accessed_at_idx ON lexical_cache (accessed_at);
+    """),
+    (3, 'index_words', """
+        DELETE FROM words AS duplicate
+        USING words AS original
+        WHERE duplicate.user_id = original.user_id
+          AND duplicate.word = original.word
+          AND duplicate.category = original.category
+          AND (duplicate.modified_date, duplicate.id) > (original.modified_date, original.id);
+        ALTER TABLE words ADD CONSTRAINT words_user_id_word_category_key UNIQUE (user_id, word, category);
+        CREATE INDEX words_user_id_status_idx ON words (user_id, status);
+        CREATE INDEX words_user_id_category_idx ON words (user_id, category);
+        CREATE INDEX words_user_id_modified_date_idx ON words (user_id, modified_date);
+        CREATE INDEX words_shown_idx ON words (id) WHERE status = 'Shown';
+    """),
+    (4, 'add_words_random_key', """
+        ALTER TABLE words ADD COLUMN rand_key DOUBLE PRECISION NOT NULL DEFAULT random();
+        DROP INDEX words_user_id_status_idx;
+        DROP INDEX words_user_id_category_idx;
+        CREATE INDEX words_user_id_status_rand_key_idx ON words (user_id, status, rand_key);
+        CREATE INDEX words_user_id_category_rand_key_idx ON words (user_id, category, rand_key);
+        CREATE INDEX words_user_id_rand_key_idx ON words (user_id, rand_key);
+    """),
+    (5, 'add_words_prior_status', """
+        ALTER TABLE words ADD COLUMN prior_status TEXT;
+    """),
+    (6, 'create_user_word_counts', """
+        CREATE TABLE user_word_counts (
+            user_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, status)
+        );
+        CREATE FUNCTION track_user_word_counts() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE user_word_counts SET n = n - 1 WHERE user_id = OLD.user_id AND status = OLD.status;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO user_word_counts (user_id, status, n) VALUES (NEW.user_id, NEW.status, 1)
+                ON CONFLICT (user_id, status) DO UPDATE SET n = user_word_counts.n + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        CREATE TRIGGER words_count_insert_delete AFTER INSERT OR DELETE ON words
+            FOR EACH ROW EXECUTE FUNCTION track_user_word_counts();
+        CREATE TRIGGER words_count_update AFTER UPDATE OF status, user_id ON words
+            FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.user_id IS DISTINCT FROM NEW.user_id)
+            EXECUTE FUNCTION track_user_word_counts();
+        LOCK TABLE words IN SHARE ROW EXCLUSIVE MODE;
+        INSERT INTO user_word_counts (user_id, status, n)
+            SELECT user_id, status, COUNT(*) FROM words GROUP BY user_id, status;
+    """),
+    (7, 'create_fsm_storage', """
+        CREATE TABLE fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data JSONB NOT NULL DEFAULT '{}',
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """),
+    (8, 'settings_integer_counts', """
+        ALTER TABLE settings ALTER COLUMN quiz_words_count DROP DEFAULT;
+        ALTER TABLE settings ALTER COLUMN quiz_exercises_count DROP DEFAULT;
+        ALTER TABLE settings
+            ALTER COLUMN quiz_words_count TYPE INTEGER
+                USING CASE WHEN quiz_words_count ~ '^[0-9]+$' THEN quiz_words_count::integer ELSE 5 END,
+            ALTER COLUMN quiz_exercises_count TYPE INTEGER
+                USING CASE WHEN quiz_exercises_count ~ '^[0-9]+$' THEN quiz_exercises_count::integer ELSE 5 END;
+        ALTER TABLE settings ALTER COLUMN quiz_words_count SET DEFAULT 5;
+        ALTER TABLE settings ALTER COLUMN quiz_exercises_count SET DEFAULT 5;
+    """),
+    (9, 'index_shown_words_by_user', """
+        DROP INDEX words_shown_idx;
+        CREATE INDEX words_shown_user_id_idx ON words (user_id) WHERE status = 'Shown';
+    """),
+]
+
+
+class MigrationRunner:
+    logger = logging.getLogger("BotDBMigrations")
+
+    # Ключ advisory lock, чтобы несколько процессов бота не применяли миграции одновременно
+    LOCK_ID = 7_420_150
+    TIMEOUT = 600
+
+    def __init__(self, pool, migrations=MIGRATIONS):
+        self.pool = pool
+        self.migrations = migrations
+
+    async def run(self):
+        async with self.pool.acquire() as conn:
+            await conn.execute("SELECT pg_advisory_lock($1);", self.LOCK_ID)
+            try:
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    );
+                """)
+                applied = {row['version'] for row in await conn.fetch("SELECT version FROM schema_migrations;")}
+                for version, name, sql_script in self.migrations:
+                    if version in applied:
+                        continue
+                    async with conn.transaction():
+                        await conn.execute(sql_script, timeout=self.TIMEOUT)
+                        await conn.execute(
+                            "INSERT INTO schema_migrations (version, name) VALUES ($1, $2);", version, name
+                        )
+                    self.logger.info(f"Applied migration {version:03d}_{name}.")
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1);", self.LOCK_ID)
+        self.logger.info("Database schema is up to date.")
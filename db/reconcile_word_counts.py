@@ -0,0 +1,18 @@
+import asyncio
+import logging
+from db.db import DB
+
+
+async def main():
+    db = DB()
+    await db.connect()
+    try:
+        drift = await db.reconcile_word_counts()
+        logging.info(f"Word counts reconciled, {len(drift)} counters corrected.")
+    finally:
+        await db.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+    asyncio.run(main())
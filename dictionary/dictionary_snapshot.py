@@ -0,0 +1,128 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from dotenv import load_dotenv
+from monitoring.metrics import cache_requests
+
+load_dotenv()
+
+SNAPSHOT_FILE = os.getenv('DICTIONARY_SNAPSHOT', 'data/dictionary.snapshot')
+MAGIC = b'LLBDICT1'
+# Заголовок: сигнатура, число слов, смещение индекса
+HEADER = struct.Struct('<8sIQ')
+# Запись индекса: смещение и длина ключа, смещение и длина сжатой статьи
+INDEX_ENTRY = struct.Struct('<QHQI')
+
+
+class DictionarySnapshot:
+    logger = logging.getLogger("DictionarySnapshot")
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self.map = None
+        self.count = 0
+        self.index_offset = 0
+        self.opened = False
+
+    def open(self):
+        # Файл отображается в память: страницы читает ОС, и воркеры разделяют их между процессами
+        self.opened = True
+        if not self.path or not os.path.exists(self.path):
+            self.logger.info(f"Dictionary snapshot {self.path!r} not found, lookups go to the network.")
+            return
+        with open(self.path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.index_offset = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.logger.error(f"{self.path!r} is not a dictionary snapshot, ignoring it.")
+            self.close()
+            return
+        self.logger.info(f"Dictionary snapshot loaded: {self.count} words.")
+
+    def get(self, word, source):
+        # Как у lexical_cache: (hit, payload); промах значит, что нужно идти в сеть
+        if not self.opened:
+            self.open()
+        if self.map is None:
+            return False, None
+        location = self._find(word.encode('utf-8'))
+        payload = None
+        if location is not None:
+            data_offset, data_length = location
+            record = json.loads(zlib.decompress(self.map[data_offset:data_offset + data_length]))
+            payload = record.get(source)
+        cache_requests.inc('snapshot', 'miss' if payload is None else 'hit')
+        if payload is None:
+            return False, None
+        return True, payload
+
+    def _find(self, key):
+        # Бинарный поиск по отсортированному индексу, без загрузки ключей в память
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, data_offset, data_length = INDEX_ENTRY.unpack_from(
+                self.map, self.index_offset + middle * INDEX_ENTRY.size)
+            current = self.map[key_offset:key_offset + key_length]
+            if current < key:
+                low = middle + 1
+            elif current > key:
+                high = middle
+            else:
+                return data_offset, data_length
+        return None
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.count = 0
+
+
+class SnapshotWriter:
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = path + '.tmp'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(self.temp_path, 'w+b')
+        self.file.write(HEADER.pack(MAGIC, 0, 0))
+        self.locations = {}
+
+    def get(self, word):
+        location = self.locations.get(word)
+        if location is None:
+            return None
+        data_offset, data_length = location
+        self.file.seek(data_offset)
+        return json.loads(zlib.decompress(self.file.read(data_length)))
+
+    def put(self, word, record):
+        # Повторная запись слова заменяет прежнюю статью в индексе
+        data = zlib.compress(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        data_offset = self.file.seek(0, os.SEEK_END)
+        self.file.write(data)
+        self.locations[word] = (data_offset, len(data))
+
+    def close(self):
+        keys = sorted((word.encode('utf-8'), location) for word, location in self.locations.items())
+        key_offsets = []
+        self.file.seek(0, os.SEEK_END)
+        for key, _ in keys:
+            key_offsets.append(self.file.tell())
+            self.file.write(key)
+        index_offset = self.file.tell()
+        for key_offset, (key, (data_offset, data_length)) in zip(key_offsets, keys):
+            self.file.write(INDEX_ENTRY.pack(key_offset, len(key), data_offset, data_length))
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, len(keys), index_offset))
+        self.file.close()
+        # Подмена целиком: работающий бот дочитывает старый снимок, новый подхватит при перезапуске
+        os.replace(self.temp_path, self.path)
+        return len(keys)
+
+
+dictionary_snapshot = DictionarySnapshot()
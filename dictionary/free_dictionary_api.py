@@ -1,127 +1,132 @@
-import requests
-import json
+import asyncio
+import logging
+import os
+from typing import NamedTuple
+import aiohttp
+from dictionary.http_session import get_session
+
+
+class PartOfSpeechEntry(NamedTuple):
+    definitions: tuple
+    examples: tuple
+    synonyms: tuple
+    antonyms: tuple
 
 
 class FreeDictionaryAPI:
-    BASE_URL = 'https://api.dictionaryapi.dev/api/v2/entries/en/'
+    BASE_URL = os.getenv('DICTIONARY_API_URL') or 'https://api.dictionaryapi.dev/api/v2/entries/en/'
+    SOURCE = 'fda'
+    LANGUAGE_PAIR = 'en'
+    DEADLINE = 4
+    MAX_DEFINITIONS = 4
+    request_errors = (aiohttp.ClientError, asyncio.TimeoutError)
+    logger = logging.getLogger("FreeDictionaryAPI")
 
-    def __init__(self, word):
+    def __init__(self, word, json_format=None):
         self.word = word
-        self.meanings = self._get_word_meanings()
-        self.categories = self._get_word_categories()
+        self.meanings = self._get_word_meanings(json_format)
+        # Ответ разбирается один раз: части речи -> определения, примеры, синонимы и антонимы
+        self.entries = self._index_meanings()
+        self.categories = list(self.entries) if self.entries else None
+        self.phonetic, self.audio_link = self._get_phonetics(json_format)
+
+    @classmethod
+    async def request(cls, word):
+        async with get_session().get(cls.BASE_URL + word) as response:
+            # "Не найдено" кэшируется на сутки, поэтому так считается только 404; 429 и 5xx - ошибка запроса
+            if response.status == 404:
+                return None
+            response.raise_for_status()
+            return await response.json(content_type=None)
 
-    def _get_word_meanings(self):
-        response = requests.get(self.BASE_URL + self.word)
-        text = response.text
-        json_format = json.loads(text)
+    @staticmethod
+    def _get_word_meanings(json_format):
         try:
             meanings = json_format[0]['meanings']
             if isinstance(json_format, list):
                 return meanings
             else:
                 return None
-        except KeyError as e:
+        except (KeyError, IndexError, TypeError):
             return None
 
-    def _get_word_categories(self) -> list:
-        if self.meanings:
-            word_categories = [meaning['partOfSpeech'].title() for meaning in self.meanings]
-            return word_categories
-        else:
-            return None
+    def _index_meanings(self) -> dict:
+        collected = {}
+        for meaning in self.meanings or []:
+            category = meaning['partOfSpeech'].title()
+            definitions, examples, synonyms, antonyms = collected.setdefault(category, ({}, {}, {}, {}))
+            # dict используется как упорядоченное множество: дубликаты отбрасываются за O(1)
+            for synonym in meaning.get('synonyms', []):
+                synonyms[synonym] = None
+            for antonym in meaning.get('antonyms', []):
+                antonyms[antonym] = None
+            for definition in meaning['definitions']:
+                if len(definitions) < self.MAX_DEFINITIONS:
+                    definitions[definition['definition']] = None
+                if 'example' in definition:
+                    examples[definition['example']] = None
+                for synonym in definition.get('synonyms', []):
+                    synonyms[synonym] = None
+                for antonym in definition.get('antonyms', []):
+                    antonyms[antonym] = None
+        return {category: PartOfSpeechEntry(*(tuple(items) for items in parts))
+                for category, parts in collected.items()}
+
+    @staticmethod
+    def _get_phonetics(json_format):
+        try:
+            phonetics = json_format[0].get('phonetics', [])
+            phonetic = json_format[0].get('phonetic')
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return None, None
+        audio_link = next((item['audio'] for item in phonetics if item.get('audio')), None)
+        if not phonetic:
+            phonetic = next((item['text'] for item in phonetics if item.get('text')), None)
+        return phonetic, audio_link
 
     def get_word_definitions(self, category_choice):
-        if category_choice in self.categories or category_choice == 'All':
-            definitions = []
-            target_definitions = {}
-            for meaning in self.meanings:
-                if category_choice == meaning['partOfSpeech'].title():
-                    for definition in meaning['definitions']:
-                        if len(definitions) < 4:
-                            definitions.append(definition['definition'])
-                    return definitions  #list
-                elif category_choice == 'All':
-                    for definition in meaning['definitions']:
-                        if len(definitions) < 4:
-                            definitions.append(definition['definition'])
-                    target_definitions[meaning['partOfSpeech'].title()] = definitions
-                    definitions = []
-            return target_definitions  #dict
+        if not self.entries:
+            return None
+        if category_choice == 'All':
+            return {category: list(entry.definitions) for category, entry in self.entries.items()}  #dict
+        elif category_choice in self.entries:
+            return list(self.entries[category_choice].definitions)  #list
         else:
             return None
 
-    def get_examples(self, category_choice) -> dict:
-        examples = []
-        target_examples = {}
-        try:
-            for meaning in self.meanings:
-                if category_choice == meaning['partOfSpeech'].title():
-                    for definition in meaning['definitions']:
-                        if 'example' in definition:
-                            examples.append(definition['example'])
-                    target_examples = examples
-                elif category_choice == 'All':
-                    for definition in meaning['definitions']:
-                        if 'example' in definition:
-                            examples.append(definition['example'])
-                        if examples:
-                            target_examples[meaning['partOfSpeech'].title()] = examples
-                            examples = []
-            if target_examples:
-                return target_examples
-            else:
-                return None
-        except TypeError:
+    def get_examples(self, category_choice):
+        if not self.entries:
+            return None
+        if category_choice == 'All':
+            target_examples = {category: list(entry.examples)
+                               for category, entry in self.entries.items() if entry.examples}
+        elif category_choice in self.entries:
+            target_examples = list(self.entries[category_choice].examples)
+        else:
+            return None
+        if target_examples:
+            return target_examples
+        else:
             return None
 
     def get_relations(self, category_choice):
-        relations = {'synonyms': [], 'antonyms': []}
-        synonyms = []
-        antonyms = []
-        try:
-            for meaning in self.meanings:
-                if category_choice == meaning['partOfSpeech'].title():
-                    for definition in meaning['definitions']:
-                        if len(definition['synonyms']) != 0:
-                            for synonym in definition['synonyms']:
-                                if synonym not in synonyms:
-                                    synonyms.append(synonym)
-                        if len(definition['antonyms']) != 0:
-                            for antonym in definition['antonyms']:
-                                if antonym not in antonyms:
-                                    antonyms.append(antonym)
-                    relations['synonyms'] = synonyms
-                    relations['antonyms'] = antonyms
-                elif category_choice == 'All':
-                    for definition in meaning['definitions']:
-                        if len(definition['synonyms']) != 0:
-                            for synonym in definition['synonyms']:
-                                if synonym not in synonyms:
-                                    synonyms.append(synonym)
-                        if len(definition['antonyms']) != 0:
-                            for antonym in definition['antonyms']:
-                                if antonym not in antonyms:
-                                    antonyms.append(antonym)
-                    relations['synonyms'] = synonyms
-                    relations['antonyms'] = antonyms
-                    synonyms = []
-                    antonyms = []
-            if relations['synonyms'] or relations['antonyms']:
-                return relations
-            else:
-                return None
-        except TypeError:
+        if not self.entries:
+            return None
+        if category_choice == 'All':
+            chosen_entries = self.entries.values()
+        elif category_choice in self.entries:
+            chosen_entries = [self.entries[category_choice]]
+        else:
+            return None
+        synonyms = {}
+        antonyms = {}
+        for entry in chosen_entries:
+            synonyms.update(dict.fromkeys(entry.synonyms))
+            antonyms.update(dict.fromkeys(entry.antonyms))
+        if synonyms or antonyms:
+            return {'synonyms': list(synonyms), 'antonyms': list(antonyms)}
+        else:
             return None
 
     def get_audio_link(self):
-        response = requests.get(self.BASE_URL + self.word)
-        if response.status_code == 200:
-            text = response.text
-            json_format = json.loads(text)
-            try:
-                audio_link = json_format[0]['phonetics'][0]['audio']
-                return audio_link
-            except (KeyError, IndexError):
-                return None
-        else:
-            return None
\ No newline at end of file
+        return self.audio_link
@@ -1,37 +1,41 @@
-import subprocess
-import json
+import asyncio
+import logging
 import mtranslate
-from dotenv import load_dotenv
-import os
+from dictionary.translate_worker_pool import get_pool, TranslateWorkerError
 
 
 class GoogleTranslateExtendedAPI:
-    load_dotenv()
-    project_dir = os.getenv('PROJ_DIR_PATH', './')
-    script_file = project_dir + '/google-translate-extended-api.js'
+    SOURCE = 'gtea'
+    LANGUAGE_PAIR = 'en-ru'
+    DEADLINE = 8
+    request_errors = (TranslateWorkerError, asyncio.TimeoutError, OSError)
+    logger = logging.getLogger("GoogleTranslateExtendedAPI")
 
-    def __init__(self, word):
+    def __init__(self, word, meaning=None):
         self.word = word
-        self.meaning = self._get_word_meanings()
+        self.meaning = meaning
         self.translation_categories = self._get_word_translation_categories()
         self.definition_categories = self._get_word_definition_categories()
 
-    def _get_word_meanings(self):
-        try:
-            result = subprocess.run(
-                ['node', self.script_file, self.word, "en", "ru"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            return json.loads(result.stdout)
-        except subprocess.CalledProcessError as e:
-            print(f"Error: {e.stderr}")
-            return None
+    @classmethod
+    async def request(cls, word):
+        meaning = await get_pool().translate(word, "en", "ru")
+        if meaning and cls._needs_fallback_translation(meaning):
+            # mtranslate ходит в сеть синхронно, поэтому запасной перевод получаем заранее и вне event loop
+            try:
+                meaning['fallbackTranslation'] = await asyncio.to_thread(mtranslate.translate, word, "ru", "en")
+            except OSError as e:
+                cls.logger.warning(f"Fallback translation of '{word}' failed: {e!r}")
+        return meaning
+
+    @staticmethod
+    def _needs_fallback_translation(meaning):
+        translations = meaning.get('translations')
+        return not translations or not all(translations.values())
 
     def _get_word_translation_categories(self):
-        # print(self.meaning['translations'].keys())
+        if not self.meaning:
+            return None
         word_categories = [key for key in self.meaning['translations'].keys()]
         if len(word_categories) != 0:
             return word_categories
@@ -39,6 +43,8 @@ class GoogleTranslateExtendedAPI:
             return None
 
     def _get_word_definition_categories(self):
+        if not self.meaning:
+            return None
         word_categories = [key for key in self.meaning['definitions'].keys()]
         if len(word_categories) != 0:
             if 'Abbreviation' in word_categories:
@@ -50,6 +56,8 @@ class GoogleTranslateExtendedAPI:
             return None
 
     def get_translations(self, category_choice):
+        if not self.meaning:
+            return None
         if category_choice.title() in self.meaning['translations'].keys() or category_choice == 'All':
             if category_choice.title() != 'All':
                 translations = self.meaning['translations'][category_choice.title()]
@@ -60,12 +68,13 @@ class GoogleTranslateExtendedAPI:
                     return translations  #list
                 else:
                     if 'Abbreviation' in translations.keys():
-                        del translations['Abbreviation']
+                        # Данные могут лежать в кэше, поэтому исходный словарь не изменяем
+                        translations = {key: value for key, value in translations.items() if key != 'Abbreviation'}
                         if not translations:
                             return self.meaning['translation']
                     return translations  #dict
             else:
-                translated = mtranslate.translate(self.word, "ru", "en")
+                translated = self.meaning.get('fallbackTranslation') or self.meaning['translation']
                 if translated != self.meaning['translation']:
                     return self.meaning['translation'] + ', ' + translated.lower()  # str
                 else:
@@ -74,20 +83,24 @@ class GoogleTranslateExtendedAPI:
             return self.meaning['translation']
 
     def get_word_definitions(self, category_choice):
+        if not self.definition_categories:
+            return None
         if category_choice in self.definition_categories or category_choice == 'All':
             if category_choice.title() != 'All':
                 definitions = self.meaning['definitions'][category_choice]
                 return definitions  #list
             else:
                 if 'Abbreviation' in self.meaning['definitions'].keys():
-                    del (self.meaning['definitions']['Abbreviation'])
-                    return self.meaning['definitions']  #dict
+                    return {key: value for key, value in self.meaning['definitions'].items()
+                            if key != 'Abbreviation'}  #dict
                 else:
                     return self.meaning['definitions']  #dict
         else:
             return None
 
     def get_examples(self):
+        if not self.meaning:
+            return None
         examples = self.meaning['examples']
         if len(examples) != 0:
             return examples
@@ -0,0 +1,37 @@
+import os
+import aiohttp
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CONNECTION_LIMIT = int(os.getenv('HTTP_CONNECTION_LIMIT', '100'))
+CONNECTION_LIMIT_PER_HOST = int(os.getenv('HTTP_CONNECTION_LIMIT_PER_HOST', '20'))
+REQUEST_TIMEOUT = float(os.getenv('HTTP_REQUEST_TIMEOUT', '5'))
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+
+_session = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    # Одна keep-alive сессия на весь процесс, создаётся при первом запросе внутри event loop
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        )
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,144 @@
+# Сборка локального снимка словаря из выгрузки Wiktionary в формате Kaikki (JSONL, одна статья на строку):
+#   python -m dictionary.import_snapshot kaikki.org-dictionary-English.jsonl
+# Статьи сохраняются в тех же форматах, что отдают dictionaryapi.dev и google-translate-extended-api,
+# поэтому LanguageProcessing разбирает их без изменений.
+import argparse
+import json
+import logging
+import time
+from dictionary.dictionary_snapshot import SnapshotWriter, SNAPSHOT_FILE
+
+PARTS_OF_SPEECH = {
+    'noun': 'noun', 'verb': 'verb', 'adj': 'adjective', 'adv': 'adverb', 'prep': 'preposition',
+    'conj': 'conjunction', 'pron': 'pronoun', 'intj': 'interjection', 'num': 'numeral', 'det': 'determiner',
+    'article': 'article', 'particle': 'particle', 'phrase': 'phrase', 'prep_phrase': 'phrase', 'abbrev': 'abbreviation'
+}
+TRANSLATION_LANGUAGE = 'ru'
+MAX_SENSES = 8
+MAX_TRANSLATE_DEFINITIONS = 3
+MAX_TRANSLATIONS = 6
+MAX_EXAMPLE_LENGTH = 200
+MAX_WORD_LENGTH = 100
+
+
+def related_words(items):
+    return list(dict.fromkeys(item['word'] for item in items or [] if item.get('word')))
+
+
+def entry_record(entry):
+    category = PARTS_OF_SPEECH[entry['pos']]
+    definitions = []
+    translations = {}
+    for item in entry.get('translations', []):
+        if item.get('code') == TRANSLATION_LANGUAGE and item.get('word'):
+            translations[item['word']] = None
+    for sense in entry.get('senses', []):
+        for item in sense.get('translations', []):
+            if item.get('code') == TRANSLATION_LANGUAGE and item.get('word'):
+                translations[item['word']] = None
+        if not sense.get('glosses') or len(definitions) >= MAX_SENSES:
+            continue
+        definition = {'definition': sense['glosses'][-1],
+                      'synonyms': related_words(sense.get('synonyms')),
+                      'antonyms': related_words(sense.get('antonyms'))}
+        example = next((item['text'] for item in sense.get('examples', [])
+                        if item.get('text') and len(item['text']) <= MAX_EXAMPLE_LENGTH), None)
+        if example:
+            definition['example'] = example
+        definitions.append(definition)
+    if not definitions:
+        return None
+
+    sounds = entry.get('sounds', [])
+    phonetic = next((sound['ipa'] for sound in sounds if sound.get('ipa')), None)
+    audio = next((sound['mp3_url'] for sound in sounds if sound.get('mp3_url')), '')
+    fda = {'word': entry['word'], 'phonetic': phonetic,
+           'phonetics': [{'text': phonetic, 'audio': audio}] if phonetic or audio else [],
+           'meanings': [{'partOfSpeech': category, 'definitions': definitions,
+                         'synonyms': related_words(entry.get('synonyms')),
+                         'antonyms': related_words(entry.get('antonyms'))}]}
+    gtea = {'word': entry['word'],
+            'translations': {category.title(): list(translations)[:MAX_TRANSLATIONS]} if translations else {},
+            'definitions': {category.title(): [item['definition'] for item in
+                                               definitions[:MAX_TRANSLATE_DEFINITIONS]]},
+            'examples': []}
+    return {'fda': [fda], 'gtea': gtea}
+
+
+def merge_records(record, other):
+    fda, other_fda = record['fda'][0], other['fda'][0]
+    fda['meanings'] += other_fda['meanings']
+    if not fda['phonetic']:
+        fda['phonetic'], fda['phonetics'] = other_fda['phonetic'], other_fda['phonetics']
+    if record.get('gtea') is None:
+        record['gtea'] = other.get('gtea')
+    elif other.get('gtea') is not None:
+        for part in ('translations', 'definitions'):
+            for category, items in other['gtea'][part].items():
+                merged = dict.fromkeys(record['gtea'][part].get(category, []))
+                merged.update(dict.fromkeys(items))
+                record['gtea'][part][category] = list(merged)
+    return record
+
+
+def finalize(record):
+    # Без русских переводов статья для переводчика не нужна: её по-прежнему даст сеть
+    gtea = record.get('gtea')
+    if gtea is None or not any(gtea['translations'].values()):
+        return {'fda': record['fda']}
+    gtea['translation'] = next(items[0] for items in gtea['translations'].values() if items)
+    return record
+
+
+def save(writer, word, record):
+    # Статьи одного слова в выгрузке обычно идут подряд; редкие повторы (Cat и cat) дописываются к прежней
+    previous = writer.get(word)
+    if previous is not None:
+        record = merge_records(previous, record)
+    writer.put(word, finalize(record))
+
+
+def import_dump(dump_path, snapshot_path):
+    writer = SnapshotWriter(snapshot_path)
+    current_word, current_record = None, None
+    skipped = 0
+    with open(dump_path, encoding='utf-8') as dump:
+        for line in dump:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+                continue
+            word = entry.get('word', '').strip().lower()
+            if (entry.get('lang_code') != 'en' or entry.get('pos') not in PARTS_OF_SPEECH
+                    or not word or len(word) > MAX_WORD_LENGTH):
+                continue
+            record = entry_record(entry)
+            if record is None:
+                continue
+            if word == current_word:
+                merge_records(current_record, record)
+            else:
+                if current_word is not None:
+                    save(writer, current_word, current_record)
+                current_word, current_record = word, record
+    if current_word is not None:
+        save(writer, current_word, current_record)
+    if skipped:
+        logging.warning(f"Skipped {skipped} malformed lines.")
+    return writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('dump', help='Kaikki JSONL dump of English Wiktionary')
+    parser.add_argument('--output', default=SNAPSHOT_FILE)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    words = import_dump(args.dump, args.output)
+    logging.info(f"Imported {words} words into {args.output} in {time.perf_counter() - started:.1f} s.")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+    main()
@@ -0,0 +1,81 @@
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from monitoring.metrics import cache_requests
+
+load_dotenv()
+
+MEMORY_MAX_ENTRIES = int(os.getenv('LEXICAL_CACHE_MEMORY_ENTRIES', '2048'))
+DB_MAX_ROWS = int(os.getenv('LEXICAL_CACHE_DB_ROWS', '100000'))
+ENTRY_TTL = timedelta(days=30)
+NOT_FOUND_TTL = timedelta(days=1)
+PRUNE_EVERY = 500
+
+
+class LexicalCache:
+    logger = logging.getLogger("LexicalCache")
+
+    def __init__(self, max_entries=MEMORY_MAX_ENTRIES, max_rows=DB_MAX_ROWS):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.entries = OrderedDict()
+        self.db = None
+        self.writes = 0
+
+    def bind(self, db):
+        # Второй уровень кэша - таблица lexical_cache в основной БД
+        self.db = db
+
+    async def get(self, word, language_pair, source):
+        # payload равен None, если источник не знает такого слова - такой ответ тоже кэшируется
+        key = (word, language_pair, source)
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > datetime.now():
+                self.entries.move_to_end(key)
+                cache_requests.inc('lexical', 'memory')
+                return True, payload
+            del self.entries[key]
+
+        if self.db is not None:
+            # Сбой БД - это промах кэша, а не ошибка поиска: слово запросится у источника
+            try:
+                row = await self.db.select_lexical_cache(word, language_pair, source)
+            except Exception as e:
+                self.logger.warning(f"Failed to read lexical cache for '{word}': {e!r}")
+                row = None
+            if row is not None:
+                payload, expires_at = row
+                self._remember(key, payload, expires_at)
+                cache_requests.inc('lexical', 'db')
+                return True, payload
+        cache_requests.inc('lexical', 'miss')
+        return False, None
+
+    async def set(self, word, language_pair, source, payload):
+        key = (word, language_pair, source)
+        expires_at = datetime.now() + (ENTRY_TTL if payload is not None else NOT_FOUND_TTL)
+        self._remember(key, payload, expires_at)
+
+        if self.db is not None:
+            # Ответ источника уже получен, поэтому неудачная запись в БД поиск не прерывает
+            try:
+                await self.db.upsert_lexical_cache(word, language_pair, source, payload, expires_at)
+                self.writes += 1
+                if self.writes % PRUNE_EVERY == 0:
+                    removed = await self.db.prune_lexical_cache(self.max_rows)
+                    self.logger.info(f"Pruned {removed} lexical cache rows.")
+            except Exception as e:
+                self.logger.warning(f"Failed to write lexical cache for '{word}': {e!r}")
+
+    def _remember(self, key, payload, expires_at):
+        self.entries[key] = (expires_at, payload)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+lexical_cache = LexicalCache()
@@ -1,23 +1,65 @@
+import asyncio
+import time
+from dictionary.dictionary_snapshot import dictionary_snapshot
 from dictionary.free_dictionary_api import FreeDictionaryAPI
 from dictionary.google_translate_extended_api import GoogleTranslateExtendedAPI
+from dictionary.lexical_cache import lexical_cache
+from monitoring.metrics import record, upstream_seconds
 
 
 class LanguageProcessing:
 
-    def __init__(self, word):
+    def __init__(self, word, gtea_version, fda_version, failed_sources=()):
         self.word = word
-        self.gtea_version = GoogleTranslateExtendedAPI(word)
-        self.fda_version = FreeDictionaryAPI(word)
+        self.gtea_version = gtea_version
+        self.fda_version = fda_version
+        self.failed_sources = set(failed_sources)
+
+    @classmethod
+    async def fetch(cls, word):
+        # Оба источника опрашиваются одновременно, у каждого свой дедлайн
+        (gtea_version, gtea_failed), (fda_version, fda_failed) = await asyncio.gather(
+            cls._fetch_source(GoogleTranslateExtendedAPI, word),
+            cls._fetch_source(FreeDictionaryAPI, word)
+        )
+        failed_sources = [source.SOURCE for source, failed in ((GoogleTranslateExtendedAPI, gtea_failed),
+                                                               (FreeDictionaryAPI, fda_failed)) if failed]
+        return cls(word, gtea_version, fda_version, failed_sources)
+
+    @staticmethod
+    async def _fetch_source(source, word):
+        # Сначала локальный снимок словаря, в сеть - только если слова в нём нет
+        hit, payload = dictionary_snapshot.get(word, source.SOURCE)
+        if hit:
+            return source(word, payload), False
+        hit, payload = await lexical_cache.get(word, source.LANGUAGE_PAIR, source.SOURCE)
+        if not hit:
+            started = time.perf_counter()
+            try:
+                payload = await asyncio.wait_for(source.request(word), timeout=source.DEADLINE)
+            except source.request_errors as e:
+                record(upstream_seconds, started, source.SOURCE, 'error', component=source.SOURCE)
+                source.logger.warning(f"Lookup of '{word}' failed: {e!r}")
+                return source(word, None), True
+            record(upstream_seconds, started, source.SOURCE, 'ok', component=source.SOURCE)
+            await lexical_cache.set(word, source.LANGUAGE_PAIR, source.SOURCE, payload)
+        return source(word, payload), False
 
     def check_definitions(self):
-        if self.fda_version.meanings and self.gtea_version.definition_categories:
+        # Если один из источников недоступен, слово проверяется по оставшемуся
+        if len(self.failed_sources) == 2:
+            return None
+        fda_found = self.fda_version.meanings or FreeDictionaryAPI.SOURCE in self.failed_sources
+        gtea_found = (self.gtea_version.definition_categories
+                      or GoogleTranslateExtendedAPI.SOURCE in self.failed_sources)
+        if fda_found and gtea_found:
             return True
         else:
             return None
 
     def get_word_categories(self) -> list:
-        fda_categories = self.fda_version.categories
-        gtea_categories = self.gtea_version.definition_categories
+        fda_categories = self.fda_version.categories or []
+        gtea_categories = self.gtea_version.definition_categories or []
         if set(fda_categories) == set(gtea_categories):
             if len(list(set(fda_categories))) > 1:
                 return list(set(fda_categories)) + ['All']
@@ -36,7 +78,8 @@ class LanguageProcessing:
             gtea_definitions = self.gtea_version.get_word_definitions(category_choice.title())
             if category_choice.title() != 'All':
                 if fda_definitions and gtea_definitions:
-                    return gtea_definitions + fda_definitions  #list
+                    # Источники могут повторять одно и то же определение
+                    return list(dict.fromkeys(gtea_definitions + fda_definitions))  #list
                 elif fda_definitions and not gtea_definitions:
                     return fda_definitions  #list
                 elif gtea_definitions and not fda_definitions:
@@ -46,7 +89,7 @@ class LanguageProcessing:
                     word_definitions = fda_definitions.copy()
                     for key, value in gtea_definitions.items():
                         if key in word_definitions:
-                            word_definitions[key].extend(value)
+                            word_definitions[key] = list(dict.fromkeys(word_definitions[key] + value))
                         else:
                             word_definitions[key] = value
                     return word_definitions  #dict
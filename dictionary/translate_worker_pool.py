@@ -0,0 +1,165 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCRIPT_FILE = os.getenv('TRANSLATE_SCRIPT') or os.getenv('PROJ_DIR_PATH', './') + '/google-translate-extended-api.js'
+POOL_SIZE = int(os.getenv('TRANSLATE_WORKERS', '2'))
+REQUEST_TIMEOUT = float(os.getenv('TRANSLATE_TIMEOUT', '10'))
+RESTART_DELAY = 1
+STREAM_LIMIT = 1024 * 1024
+
+
+class TranslateWorkerError(Exception):
+    pass
+
+
+class TranslateWorker:
+    logger = logging.getLogger("TranslateWorker")
+
+    def __init__(self, script_file, index):
+        self.script_file = script_file
+        self.index = index
+        self.process = None
+        self.pending = {}
+        self.closing = False
+        self._reader_task = None
+        self._stderr_task = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            'node', self.script_file,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LIMIT
+        )
+        self._reader_task = asyncio.create_task(self._read_responses())
+        self._stderr_task = asyncio.create_task(self._read_errors())
+        self.logger.info(f"Translate worker #{self.index} started (pid {self.process.pid}).")
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.returncode is None
+
+    async def request(self, request_id, text, from_lang, to_lang):
+        if not self.alive:
+            raise TranslateWorkerError(f"Worker #{self.index} is restarting")
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        line = json.dumps({'id': request_id, 'text': text, 'from': from_lang, 'to': to_lang}) + '\n'
+        try:
+            self.process.stdin.write(line.encode('utf-8'))
+            await self.process.stdin.drain()
+        except (ConnectionError, AttributeError) as e:
+            self.pending.pop(request_id, None)
+            raise TranslateWorkerError(f"Worker #{self.index} is not accepting requests: {e!r}")
+        return future
+
+    async def _read_responses(self):
+        while True:
+            try:
+                line = await self.process.stdout.readline()
+            except ValueError:
+                self.logger.error(f"Translate worker #{self.index} sent an oversized response.")
+                continue
+            if not line:
+                break
+            try:
+                response = json.loads(line)
+            except json.JSONDecodeError:
+                self.logger.error(f"Translate worker #{self.index} sent malformed output: {line[:200]!r}")
+                continue
+            future = self.pending.pop(response.get('id'), None)
+            if future is None or future.done():
+                continue
+            if 'error' in response:
+                future.set_exception(TranslateWorkerError(response['error']))
+            else:
+                future.set_result(response.get('result'))
+        await self._handle_exit()
+
+    async def _read_errors(self):
+        async for line in self.process.stderr:
+            self.logger.warning(f"Translate worker #{self.index}: {line.decode('utf-8', 'replace').rstrip()}")
+
+    async def _handle_exit(self):
+        return_code = await self.process.wait()
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(TranslateWorkerError(f"Worker #{self.index} exited with code {return_code}"))
+        self.pending = {}
+        if self.closing:
+            return
+        self.logger.error(f"Translate worker #{self.index} exited with code {return_code}, restarting.")
+        await asyncio.sleep(RESTART_DELAY)
+        if not self.closing:
+            await self.start()
+
+    async def close(self):
+        self.closing = True
+        if self.process and self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=RESTART_DELAY)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        for task in (self._reader_task, self._stderr_task):
+            if task and task is not asyncio.current_task():
+                task.cancel()
+
+
+class TranslateWorkerPool:
+
+    def __init__(self, script_file=SCRIPT_FILE, size=POOL_SIZE, timeout=REQUEST_TIMEOUT):
+        self.workers = [TranslateWorker(script_file, index) for index in range(max(size, 1))]
+        self.timeout = timeout
+        self.request_ids = itertools.count()
+        self.started = False
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._start_lock:
+            if not self.started:
+                await asyncio.gather(*(worker.start() for worker in self.workers))
+                self.started = True
+
+    async def translate(self, word, src, dst):
+        if not self.started:
+            await self.start()
+        workers = [worker for worker in self.workers if worker.alive]
+        if not workers:
+            raise TranslateWorkerError("No translate workers are running")
+        # Запрос уходит наименее загруженному воркеру
+        worker = min(workers, key=lambda w: len(w.pending))
+        request_id = next(self.request_ids)
+        future = await worker.request(request_id, word, src, dst)
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        finally:
+            worker.pending.pop(request_id, None)
+
+    async def close(self):
+        await asyncio.gather(*(worker.close() for worker in self.workers))
+
+
+_pool = None
+
+
+def get_pool() -> TranslateWorkerPool:
+    global _pool
+    if _pool is None:
+        _pool = TranslateWorkerPool()
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+    _pool = None
@@ -1,3 +1,4 @@
+const readline = require('readline');
 const translate = require('google-translate-extended-api');
 
 process.stdout.setEncoding('utf8');
@@ -6,8 +7,31 @@ const text = process.argv[2];
 const fromLang = process.argv[3];
 const toLang = process.argv[4];
 
-translate(text, fromLang, toLang).then((res) => {
-    console.log(JSON.stringify(res, null, 2));
-}).catch((err) => {
-    console.error(err);
-});
\ No newline at end of file
+if (text) {
+    // Разовый запуск из командной строки: node google-translate-extended-api.js <word> <from> <to>
+    translate(text, fromLang, toLang).then((res) => {
+        console.log(JSON.stringify(res, null, 2));
+    }).catch((err) => {
+        console.error(err);
+    });
+} else {
+    // Режим воркера: один JSON-запрос на строку в stdin, один JSON-ответ на строку в stdout
+    const rl = readline.createInterface({input: process.stdin, terminal: false});
+
+    rl.on('line', (line) => {
+        let request;
+        try {
+            request = JSON.parse(line);
+        } catch (err) {
+            console.error(`Malformed request: ${line}`);
+            return;
+        }
+        translate(request.text, request.from, request.to).then((res) => {
+            process.stdout.write(JSON.stringify({id: request.id, result: res}) + '\n');
+        }).catch((err) => {
+            process.stdout.write(JSON.stringify({id: request.id, error: String(err)}) + '\n');
+        });
+    });
+
+    rl.on('close', () => process.exit(0));
+}
@@ -3,9 +3,18 @@ import asyncio
 import logging
 from logging.handlers import TimedRotatingFileHandler
 from datetime import datetime, timedelta
-from aiogram import Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram import Bot, Dispatcher
 from bot.bot_routers.bot_routers_main import BotRouters
+from bot.fsm_storage import PostgresStorage
+from bot.metrics_middleware import setup_metrics
+from bot.outbound_queue import outbound_queue
+from bot.sharding import ShardSupervisor, ShardWorker, WORKER_COUNT
+from bot.telegram_session import TelegramSession
+from bot.webhook_server import WebhookServer
+from dictionary.dictionary_snapshot import dictionary_snapshot
+from dictionary.http_session import close_session
+from dictionary.translate_worker_pool import close_pool
+from monitoring.metrics import MetricsServer
 
 os.makedirs('logs', exist_ok=True)
 
@@ -21,8 +30,10 @@ def remove_old_logs(log_dir, days_to_keep=5):
                 logging.info(f"Removed old log file: {filename}")
 
 
+# Воркеры многопроцессного режима пишут каждый в свой файл
+shard_index = os.getenv('BOT_SHARD_INDEX')
 log_handler = TimedRotatingFileHandler(
-    "logs/bot.log",
+    f"logs/bot-worker{shard_index}.log" if shard_index is not None else "logs/bot.log",
     when="midnight",  # Обновление файла каждый день в полночь
     interval=1,
     encoding='utf-8'
@@ -48,11 +59,54 @@ async def periodic_log_cleanup():
         await asyncio.sleep(24 * 60 * 60)  # Запускать каждый день
 
 
+async def run_supervisor():
+    # Супервизор только принимает обновления и раздаёт их воркерам по user id
+    bot = Bot(token=os.getenv('BOT_TOKEN'), session=TelegramSession())
+    supervisor = ShardSupervisor()
+    await supervisor.start()
+    try:
+        if os.getenv('BOT_MODE', 'polling') == 'webhook':
+            await WebhookServer(supervisor, bot).run()
+        else:
+            await supervisor.poll(bot)
+    finally:
+        await supervisor.close()
+        await bot.session.close()
+
+
 async def main():
+    if shard_index is None and WORKER_COUNT > 1:
+        await run_supervisor()
+        return
     bot_handler = BotRouters()
-    dp = Dispatcher(storage=MemoryStorage())
+    await bot_handler.db.connect()
+    storage = PostgresStorage(bot_handler.db)
+    dp = Dispatcher(storage=storage)
     dp.include_router(bot_handler.router)
-    await dp.start_polling(bot_handler.bot)
+    setup_metrics(dp)
+    metrics_server = None
+    if os.getenv('METRICS_PORT'):
+        # У каждого воркера свой порт: METRICS_PORT + 1 + номер воркера
+        port = int(os.getenv('METRICS_PORT')) + (int(shard_index) + 1 if shard_index is not None else 0)
+        metrics_server = MetricsServer(port)
+        await metrics_server.start()
+    try:
+        if shard_index is not None:
+            await ShardWorker(int(shard_index), dp, bot_handler.bot, storage, bot_handler).run()
+        elif os.getenv('BOT_MODE', 'polling') == 'webhook':
+            await WebhookServer(dp, bot_handler.bot).run()
+        else:
+            await dp.start_polling(bot_handler.bot)
+    finally:
+        if metrics_server is not None:
+            await metrics_server.close()
+        await outbound_queue.close()
+        await storage.close()
+        await close_session()
+        await close_pool()
+        dictionary_snapshot.close()
+        await bot_handler.db.close()
+        await bot_handler.bot.session.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,203 @@
+import bisect
+import inspect
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from aiohttp import web
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Обновления дольше порога попадают в лог с разбивкой времени по компонентам
+TRACE_THRESHOLD = float(os.getenv('METRICS_TRACE_THRESHOLD', '500')) / 1000
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Histogram:
+
+    def __init__(self, name, documentation, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # Значения меток -> [счётчики по корзинам (последняя - +Inf), сумма, количество]
+        self.series = {}
+
+    def observe(self, seconds, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, seconds)] += 1
+        series[1] += seconds
+        series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, [('le', bound)])} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+class Counter:
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, *label_values, value=1):
+        self.series[label_values] = self.series.get(label_values, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+                  for label_values, value in self.series.items()]
+        return lines
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.metrics = []
+        # Источники готовых показателей (очередь отправки, lru_cache): префикс -> функция, возвращающая dict
+        self.gauges = {}
+
+    def histogram(self, name, documentation, labels=()):
+        metric = Histogram(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        metric = Counter(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge_source(self, prefix, collect):
+        self.gauges[prefix] = collect
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for prefix, collect in self.gauges.items():
+            for name, value in collect().items():
+                lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value}"]
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+update_seconds = registry.histogram('bot_update_seconds', "Time to process one update.", ('handler',))
+handler_seconds = registry.histogram('bot_handler_seconds', "Time spent in a router handler.", ('handler',))
+db_query_seconds = registry.histogram('bot_db_query_seconds', "PostgreSQL round trip per query.", ('operation',))
+db_method_seconds = registry.histogram('bot_db_method_seconds', "Time spent in a DB method.", ('method',))
+upstream_seconds = registry.histogram('bot_upstream_seconds', "Dictionary and translation lookups.",
+                                      ('source', 'outcome'))
+telegram_seconds = registry.histogram('bot_telegram_request_seconds', "Bot API requests.", ('method', 'outcome'))
+outbound_seconds = registry.histogram('bot_outbound_send_seconds',
+                                      "Time from queueing a message to the Bot API response.", ('priority',))
+cache_requests = registry.counter('bot_cache_requests_total', "Cache lookups.", ('cache', 'result'))
+
+
+class UpdateTrace:
+    __slots__ = ('update_id', 'handler', 'components')
+
+    def __init__(self, update_id):
+        self.update_id = update_id
+        self.handler = 'unhandled'
+        # Компонент -> [время, количество вызовов]
+        self.components = {}
+
+    def add(self, component, seconds):
+        spent = self.components.setdefault(component, [0.0, 0])
+        spent[0] += seconds
+        spent[1] += 1
+
+    def summary(self, total):
+        parts = ', '.join(f"{component} {seconds * 1000:.1f} ms/{calls}"
+                          for component, (seconds, calls) in self.components.items())
+        return f"Update {self.update_id} ({self.handler}): {total * 1000:.1f} ms" + (f"; {parts}" if parts else '')
+
+
+# Трассировка текущего обновления; задачи, запущенные обработчиком, наследуют её вместе с контекстом
+current_trace = ContextVar('current_trace', default=None)
+
+
+def record(histogram, started, *label_values, component=None):
+    # started - значение time.perf_counter() в начале измерения; component - строка в трассировке обновления
+    elapsed = time.perf_counter() - started
+    histogram.observe(elapsed, *label_values)
+    trace = current_trace.get()
+    if component is not None and trace is not None:
+        trace.add(component, elapsed)
+
+
+@contextmanager
+def timed(histogram, *label_values, component=None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(histogram, started, *label_values, component=component)
+
+
+def timed_methods(histogram, exclude=()):
+    # Декоратор класса: каждый публичный async-метод пишет своё время в histogram с меткой по имени метода
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith('_') or name in exclude or not inspect.iscoroutinefunction(method):
+                continue
+            setattr(cls, name, _timed_method(histogram, name, method))
+        return cls
+    return decorate
+
+
+def _timed_method(histogram, name, method):
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        with timed(histogram, name):
+            return await method(*args, **kwargs)
+    return wrapper
+
+
+class MetricsServer:
+    logger = logging.getLogger("MetricsServer")
+
+    def __init__(self, port, host=None):
+        self.host = host or os.getenv('METRICS_HOST', '127.0.0.1')
+        self.port = port
+        self.runner = None
+
+    @staticmethod
+    async def handle_metrics(request: web.Request):
+        return web.Response(body=registry.render().encode('utf-8'),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle_metrics)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        self.logger.info(f"Serving metrics on {self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
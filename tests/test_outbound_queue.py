@@ -0,0 +1,28 @@
+import asyncio
+import unittest
+from bot.outbound_queue import OutboundQueue
+
+
+class OutboundQueueTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_string_and_int_chat_id_share_one_queue(self):
+        queue = OutboundQueue()
+        sent = []
+
+        async def request(text):
+            sent.append(text)
+            return text
+
+        try:
+            await asyncio.gather(queue.send('42', lambda: request('reminder')),
+                                 queue.send(42, lambda: request('reply')))
+            self.assertEqual(list(queue.chats), [42])
+            # Оба сообщения списали токены из одного лимита чата
+            self.assertLess(queue.chats[42].bucket.tokens, queue.chat_burst - 1)
+            self.assertEqual(sent, ['reminder', 'reply'])
+        finally:
+            await queue.close()
+
+
+if __name__ == '__main__':
+    unittest.main()